@@ -1,15 +1,20 @@
-import os
-from groq import Groq
-from typing import List
+import logging
+from typing import List, Optional, Dict, AsyncIterator
+from core.llm import LLMClient, DEFAULT_MODEL
+from core.context import ContextBuilder
+from core.replies import ReplyEngine
+from utils.metrics import FALLBACKS, EXCEPTIONS
 from models.api import MessageItem, SenderType
 
+logger = logging.getLogger("scambaiter")
+
 class HoneyPotAgent:
-    def __init__(self):
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            raise ValueError("GROQ_API_KEY not set")
-        self.client = Groq(api_key=api_key)
-        self.model_name = "moonshotai/kimi-k2-instruct"
+    def __init__(self, client: Optional[LLMClient] = None, replies: Optional[ReplyEngine] = None):
+        self.client = client or LLMClient()
+        # Local templates answer repetitive low-value turns without an LLM call
+        self.replies = replies or ReplyEngine()
+        self.model_name = DEFAULT_MODEL
+        self.context = ContextBuilder.for_module("agent", 1200)
         
         self.system_instruction = """
         You are a persona in a scambaiting honeypot.
@@ -32,67 +37,88 @@ class HoneyPotAgent:
         - NEVER give real info.
         """
 
-    def generate_reply(self, history: List[MessageItem], current_message: str) -> str:
+    def _build_messages(self, history: List[MessageItem], current_message: str) -> List[Dict[str, str]]:
         # Build chat history for Groq (OpenAI-compatible format)
         messages = [{"role": "system", "content": self.system_instruction}]
         
         # Add a priming assistant message to enforce persona adoption
         messages.append({"role": "assistant", "content": "I understand. I am Mrs. Sharma, an elderly Indian woman. I will act confused and waste the scammer's time."})
         
-        for msg in history:
+        # The current message is appended in full below; checked before building
+        # because the context window may truncate long messages
+        if history and history[-1].sender.value == "scammer" and history[-1].text == current_message:
+            history = history[:-1]
+
+        # Budgeted window of recent turns; older turns collapse into a summary
+        summary, recent = self.context.build(history)
+        if summary:
+            messages.append({"role": "system", "content": f"Earlier in this conversation: {summary}"})
+
+        for msg in recent:
             # Map SenderType to role
             # SenderType.SCAMMER ("scammer") -> user
             # SenderType.USER ("user") -> assistant (agent)
             role = "user" if msg.sender.value == "scammer" else "assistant"
             messages.append({"role": role, "content": msg.text})
             
-        # Add current message
         messages.append({"role": "user", "content": current_message})
+        return messages
+
+    async def generate_reply(self, history: List[MessageItem], current_message: str, session_id: Optional[str] = None) -> str:
+        template = self.replies.template_reply(current_message, history, session_id)
+        if template is not None:
+            return template
+
+        messages = self._build_messages(history, current_message)
         
         try:
-            chat_completion = self.client.chat.completions.create(
+            chat_completion = await self.client.chat(
                 messages=messages,
                 model=self.model_name,
                 temperature=0.7,
-                max_tokens=150
+                max_tokens=150,
+                module="agent"
             )
             return chat_completion.choices[0].message.content.strip().replace("\n", " ")
         except Exception as e:
-            print(f"Agent generation error: {e}")
-            # Fallback in Persona (Randomized + Anti-Repetition)
-            import random
-            fallbacks = [
-                "beta my internet is not working not going what you say? my grandson will fix wait",
-                "beta wait i am asking my grandson to help i dont understand",
-                "internet is very slow beta cannot hear you",
-                "my glasses are lost i cannot see screen properly what to do",
-                "don't be angry beta i am trying slowly",
-                "i am clicking but nothing happening beta",
-                "beta what is this code i dont know these things",
-                "my hands are shaking beta cannot type fast",
-                "is this computer virus beta? i am scared",
-                "wait beta i am calling my son to check phone"
-            ]
-            
-            # Simple anti-repetition logic
-            candidate = random.choice(fallbacks)
-            # Check last few messages to avoid repeating recent fallbacks
-            try:
-                # History structure: List[MessageItem]
-                # Filter for agent messages (which are labeled as 'user' in this system)
-                recent_agent_msgs = [
-                    m.text for m in getattr(history, 'root', history) 
-                    if hasattr(m, 'sender') and m.sender.value == 'user'
-                ]
-            except:
-                recent_agent_msgs = []
+            logger.warning(f"Agent generation error: {e}")
+            EXCEPTIONS.inc(module="agent")
+            return self.fallback_reply(history, current_message, session_id)
 
-            # Try to pick a new one if it matches the last one
-            if recent_agent_msgs:
-                last_msg = recent_agent_msgs[-1]
-                if last_msg == candidate:
-                    # Pick another one
-                    candidates_left = [f for f in fallbacks if f != candidate]
-                    candidate = random.choice(candidates_left) if candidates_left else candidate
-            
-            return candidate
+    async def stream_reply(self, history: List[MessageItem], current_message: str, session_id: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Streams the reply as newline-free text chunks. Falls back to a canned persona
+        reply if the model fails before producing any text.
+        """
+        template = self.replies.template_reply(current_message, history, session_id)
+        if template is not None:
+            yield template
+            return
+
+        messages = self._build_messages(history, current_message)
+        started = False
+        try:
+            async for delta in self.client.stream(
+                messages=messages,
+                model=self.model_name,
+                temperature=0.7,
+                max_tokens=150,
+                module="agent"
+            ):
+                chunk = delta.replace("\n", " ")
+                if not started:
+                    chunk = chunk.lstrip()
+                    if not chunk:
+                        continue
+                    started = True
+                yield chunk
+        except Exception as e:
+            logger.warning(f"Agent streaming error: {e}")
+            EXCEPTIONS.inc(module="agent")
+            if not started:
+                yield self.fallback_reply(history, current_message, session_id)
+
+    def fallback_reply(self, history: List[MessageItem], current_message: str = "", session_id: Optional[str] = None) -> str:
+        FALLBACKS.inc(module="agent")
+        # Persona template for the message's intent, not yet used in this session
+        return self.replies.fallback(current_message, history, session_id)
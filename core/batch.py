@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from core.regex_engine import engine
+
+class BatchScorer:
+    """
+    Offline triage of message corpora. Messages go through the cascade's
+    LLM-free tiers first; the uncertain ones are packed `pack_size` at a time
+    into a single ScamDetector.detect_batch call, with at most `concurrency`
+    packs in flight. Results come back in input order, one dict per message.
+    """
+
+    def __init__(self, cascade, detector, pack_size: Optional[int] = None, concurrency: Optional[int] = None):
+        self.cascade = cascade
+        self.detector = detector
+        self.pack_size = pack_size or int(os.getenv("BATCH_PACK_SIZE", "20"))
+        self.concurrency = concurrency or int(os.getenv("BATCH_CONCURRENCY", "8"))
+        self.counts = {"messages": 0, "errors": 0, "llmPacks": 0, "tiers": {"intel": 0, "lexical": 0, "model": 0, "llm": 0}}
+
+    async def score(self, rows: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        window = []
+        async for row in rows:
+            window.append(row)
+            if len(window) >= self.pack_size * self.concurrency:
+                for result in await self._score_window(window):
+                    yield result
+                window = []
+        if window:
+            for result in await self._score_window(window):
+                yield result
+
+    async def _score_window(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results = []
+        uncertain = []
+        for row in rows:
+            if "error" in row:
+                self.counts["errors"] += 1
+                results.append(row)
+                continue
+            data, _ = engine.extract_text(row["text"])
+            result = {"id": row["id"], "isScam": None, "tier": None, "extractedIntelligence": data}
+            local = self.cascade.detect_local(row["text"], data)
+            if local is not None:
+                result["tier"], result["isScam"] = local
+            else:
+                uncertain.append((result, row["text"]))
+            results.append(result)
+
+        packs = [uncertain[i:i + self.pack_size] for i in range(0, len(uncertain), self.pack_size)]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_pack(pack):
+            async with semaphore:
+                verdicts = await self.detector.detect_batch([text for _, text in pack])
+            for (result, _), is_scam in zip(pack, verdicts):
+                if is_scam is None:
+                    # Unscored, not a verdict; a resumed run retries it
+                    result["error"] = "LLM classification failed"
+                    self.counts["errors"] += 1
+                else:
+                    result["tier"], result["isScam"] = "llm", is_scam
+
+        await asyncio.gather(*(run_pack(pack) for pack in packs))
+        self.counts["llmPacks"] += len(packs)
+        for result in results:
+            if result.get("tier"):
+                self.counts["messages"] += 1
+                self.counts["tiers"][result["tier"]] += 1
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counts, tiers=dict(self.counts["tiers"]))
+
+def parse_row(line: str, line_no: int) -> Optional[Dict[str, Any]]:
+    """
+    Accepts {"id": ..., "text": ...} or {"id": ..., "message": {"text": ...}} lines.
+    The id defaults to the line number. Returns None for blank lines.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        row = json.loads(line)
+        text = row.get("text")
+        if text is None and isinstance(row.get("message"), dict):
+            text = row["message"].get("text")
+        if not isinstance(text, str):
+            raise ValueError("missing text")
+        return {"id": row.get("id", line_no), "text": text}
+    except Exception as e:
+        return {"id": line_no, "error": f"invalid line: {e}"}
+
+async def iter_rows(lines: AsyncIterator[str], done_ids: Iterable[str] = ()) -> AsyncIterator[Dict[str, Any]]:
+    done = set(done_ids)
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        row = parse_row(line, line_no)
+        if row is not None and str(row["id"]) not in done:
+            yield row
+
+async def aiter_lines(lines: Iterable[str]) -> AsyncIterator[str]:
+    for line in lines:
+        yield line
+
+async def iter_file_lines(path: str) -> AsyncIterator[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield line
+
+def completed_ids(path: str) -> List[str]:
+    """
+    Ids already written to an output file, so an interrupted run can resume.
+    Messages whose LLM call failed (isScam null) are not counted, so a resumed
+    run scores them again and appends a second line for the id.
+    """
+    if not os.path.exists(path):
+        return []
+    ids = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+                if "isScam" in row and row["isScam"] is None:
+                    continue
+                ids.append(str(row["id"]))
+            except Exception:
+                # Partial last line from an interrupted run
+                continue
+    return ids
+
+async def run_file(scorer: BatchScorer, input_path: str, output_path: str, resume: bool = True):
+    done = completed_ids(output_path) if resume else []
+    if done:
+        print(f"Resuming: skipping {len(done)} messages already in {output_path}")
+    mode = "a" if resume else "w"
+    with open(output_path, mode, encoding="utf-8") as out:
+        if resume and out.tell() > 0:
+            # Terminate a partial line left by an interrupted run
+            with open(output_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    out.write("\n")
+        async for result in scorer.score(iter_rows(iter_file_lines(input_path), done)):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    print(json.dumps(scorer.stats()))
+
+async def main(args) -> int:
+    from dotenv import load_dotenv
+    load_dotenv()
+    from core.llm import LLMClient
+    from core.detector import ScamDetector
+    from core.cascade import DetectionCascade
+    from utils.cache import ResponseCache
+
+    client = LLMClient()
+    detector = ScamDetector(client, ResponseCache.from_env())
+    scorer = BatchScorer(DetectionCascade(detector), detector, args.pack_size, args.concurrency)
+    try:
+        await run_file(scorer, args.input, args.output, resume=not args.restart)
+    finally:
+        await client.aclose()
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a JSONL corpus of messages for scam intent")
+    parser.add_argument("input", help="JSONL with one {\"id\": ..., \"text\": ...} per line")
+    parser.add_argument("output", help="JSONL results; appended to and resumed from if it exists")
+    parser.add_argument("--pack-size", type=int, default=None, help="messages per LLM prompt (BATCH_PACK_SIZE)")
+    parser.add_argument("--concurrency", type=int, default=None, help="LLM prompts in flight (BATCH_CONCURRENCY)")
+    parser.add_argument("--restart", action="store_true", help="overwrite the output instead of resuming")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+from core.regex_engine import engine
+from models.api import MessageItem
+from utils.cache import LRUCache
+from utils.metrics import FALLBACKS
+
+logger = logging.getLogger("scambaiter")
+
+# Keywords that on their own are a strong scam signal; the rest of
+# SCAM_KEYWORDS (click, link, support, ...) only count as weak evidence
+STRONG_KEYWORDS = {
+    "account blocked", "account will be blocked", "blocked", "unblock", "suspended", "suspension",
+    "kyc", "update kyc", "verify now", "otp", "share otp", "cvv", "lottery", "prize", "winner",
+    "processing fee", "legal action", "arrest", "anydesk", "teamviewer", "screen share",
+}
+STRONG_WEIGHT = 0.5
+WEAK_WEIGHT = 0.25
+INDICATOR_WEIGHTS = {"upiIds": 0.5, "phishingLinks": 0.4, "bankAccounts": 0.4, "phoneNumbers": 0.2}
+
+# "fallback": the LLM failed and the fail-safe verdict was used (never cached)
+TIERS = ["session", "intel", "lexical", "model", "llm", "fallback"]
+
+def lexical_score(text: str, data: Optional[Dict[str, List[str]]] = None) -> float:
+    """
+    Cheap scam score from the regex engine's keyword matcher and indicators.
+    """
+    if data is None:
+        data, _ = engine.extract_text(text)
+    score = sum(STRONG_WEIGHT if kw in STRONG_KEYWORDS else WEAK_WEIGHT for kw in data["suspiciousKeywords"])
+    for key, weight in INDICATOR_WEIGHTS.items():
+        if data[key]:
+            score += weight
+    return score
+
+class LocalModelTier:
+    """
+    Optional TF-IDF + logistic regression classifier (scikit-learn/joblib).
+    Disabled when DETECTOR_MODEL_PATH is unset or scikit-learn is not installed.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.model = None
+        path = path or os.getenv("DETECTOR_MODEL_PATH")
+        if not path:
+            return
+        try:
+            import joblib
+            self.model = joblib.load(path)
+        except Exception as e:
+            logger.warning(f"Local detection model unavailable: {e}")
+
+    def predict(self, text: str) -> Optional[float]:
+        if self.model is None:
+            return None
+        return float(self.model.predict_proba([text])[0][1])
+
+def train_local_model(data_path: str, out_path: str):
+    """
+    Trains the local tier from JSONL lines of {"text": ..., "is_scam": bool}.
+    """
+    import joblib
+    from sklearn.pipeline import make_pipeline
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    texts, labels = [], []
+    with open(data_path, "r") as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                texts.append(row["text"])
+                labels.append(int(bool(row["is_scam"])))
+
+    model = make_pipeline(TfidfVectorizer(ngram_range=(1, 2), min_df=1, sublinear_tf=True), LogisticRegression(max_iter=1000))
+    model.fit(texts, labels)
+    joblib.dump(model, out_path)
+    print(f"Trained on {len(texts)} messages -> {out_path}")
+
+class DetectionCascade:
+    """
+    Tiered scam detection in front of the LLM-based ScamDetector:
+    1. session verdict cache (a session judged a scam stays a scam)
+    2. known-bad indicators from the intel store (UPI IDs, phones, ... seen in earlier scams)
+    3. lexical/regex scorer built from the extractor's keyword list
+    4. optional local TF-IDF + logistic regression model
+    5. ScamDetector (LLM) for whatever is still uncertain
+    """
+
+    def __init__(self, detector, local_model: Optional[LocalModelTier] = None, intel_store=None):
+        self.detector = detector
+        self.intel_store = intel_store
+        self.verdicts = LRUCache(
+            maxsize=int(os.getenv("CASCADE_MAX_SESSIONS", "10000")),
+            ttl=float(os.getenv("CASCADE_VERDICT_TTL", "3600")),
+        )
+        self.lexical_threshold = float(os.getenv("CASCADE_LEXICAL_THRESHOLD", "1.0"))
+        self.model_high = float(os.getenv("CASCADE_MODEL_HIGH", "0.9"))
+        self.model_low = float(os.getenv("CASCADE_MODEL_LOW", "0.05"))
+        self.local_model = local_model or LocalModelTier()
+        self.hits = {tier: 0 for tier in TIERS}
+        self._lock = threading.Lock()
+
+    async def detect(self, message: str, history: List[MessageItem], session_id: Optional[str] = None) -> bool:
+        if session_id and self.verdicts.get(session_id):
+            return self._hit("session", True)
+
+        local = self.detect_local(message, session_id=session_id)
+        if local is not None:
+            return self._remember(session_id, self._hit(*local))
+
+        is_scam = await self.detector.classify(message, history)
+        if is_scam is None:
+            # Same fail-safe as ScamDetector.detect, but a transient LLM error must
+            # not become the session's sticky verdict
+            FALLBACKS.inc(module="detector")
+            return self._hit("fallback", True)
+        return self._remember(session_id, self._hit("llm", is_scam))
+
+    def detect_cheap(self, message: str, session_id: Optional[str] = None) -> Optional[bool]:
+        """
+        Session verdict and LLM-free tiers only (used when shedding load).
+        None when those tiers are uncertain.
+        """
+        if session_id and self.verdicts.get(session_id):
+            return self._hit("session", True)
+        local = self.detect_local(message, session_id=session_id)
+        if local is None:
+            return None
+        return self._remember(session_id, self._hit(*local))
+
+    def detect_local(
+        self, message: str, data: Optional[Dict[str, List[str]]] = None, session_id: Optional[str] = None
+    ) -> Optional[Tuple[str, bool]]:
+        """
+        Runs only the LLM-free tiers. Returns (tier, verdict) or None when uncertain.
+        `data` is the regex engine's result for `message` when the caller already has it.
+        """
+        if data is None:
+            data, _ = engine.extract_text(message)
+        if self.intel_store is not None and self.intel_store.known_bad(data, session_id):
+            return "intel", True
+
+        if lexical_score(message, data) >= self.lexical_threshold:
+            return "lexical", True
+
+        proba = self.local_model.predict(message)
+        if proba is not None and (proba >= self.model_high or proba <= self.model_low):
+            return "model", proba >= self.model_high
+        return None
+
+    def _hit(self, tier: str, verdict: bool) -> bool:
+        with self._lock:
+            self.hits[tier] += 1
+        return verdict
+
+    def _remember(self, session_id: Optional[str], is_scam: bool) -> bool:
+        # Only scam verdicts are sticky; a benign turn can still turn into a scam
+        if session_id and is_scam:
+            self.verdicts.set(session_id, True)
+        return is_scam
+
+    def stats(self) -> Dict[str, Any]:
+        total = sum(self.hits.values())
+        return {
+            "total": total,
+            "hits": dict(self.hits),
+            "hitRates": {tier: (count / total if total else 0.0) for tier, count in self.hits.items()},
+        }
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] != "train":
+        print("Usage: python -m core.cascade train <labelled.jsonl> <model.joblib>")
+        sys.exit(1)
+    train_local_model(sys.argv[2], sys.argv[3])
@@ -0,0 +1,140 @@
+import os
+import re
+import threading
+from typing import List, Optional, Tuple
+from core.regex_engine import engine
+from models.api import MessageItem, SenderType
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+_ENCODING = None
+_ENCODING_LOADED = False
+_ENCODING_LOCK = threading.Lock()
+
+def _encoding():
+    # tiktoken (optional) is loaded on first use; loading the encoding is slow
+    # and may download it, so the app loads it during warm-up (load_encoding)
+    global _ENCODING, _ENCODING_LOADED
+    if not _ENCODING_LOADED:
+        with _ENCODING_LOCK:
+            if not _ENCODING_LOADED:
+                try:
+                    import tiktoken
+                    _ENCODING = tiktoken.get_encoding("cl100k_base")
+                except Exception:
+                    _ENCODING = None
+                _ENCODING_LOADED = True
+    return _ENCODING
+
+def load_encoding() -> bool:
+    """
+    Loads the tokenizer now (blocking). True when tiktoken is in use.
+    """
+    return _encoding() is not None
+
+def count_tokens(text: str) -> int:
+    """
+    Local token count: tiktoken when installed, otherwise a word/punctuation
+    approximation (close enough for budgeting).
+    """
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(_TOKEN_RE.findall(text))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text)[:max_tokens]) + " ..."
+    pieces = _TOKEN_RE.finditer(text)
+    end = 0
+    for i, m in enumerate(pieces):
+        if i >= max_tokens:
+            break
+        end = m.end()
+    return text[:end] + " ..."
+
+def dedupe_messages(history: List[MessageItem]) -> List[MessageItem]:
+    """
+    Drops consecutive repeats of the same message from the same sender.
+    """
+    result = []
+    for msg in history:
+        if result and result[-1].sender == msg.sender and result[-1].text.strip() == msg.text.strip():
+            continue
+        result.append(msg)
+    return result
+
+def summarize(messages: List[MessageItem]) -> str:
+    """
+    Cheap extractive summary of older turns: counts, scam tactics and every
+    identifier the scammer has shared (so nothing extractable is lost).
+    """
+    scammer = [m for m in messages if m.sender == SenderType.SCAMMER]
+    data, _ = engine.extract_messages(messages)
+    parts = [f"{len(messages)} earlier messages ({len(scammer)} from scammer)."]
+    if scammer:
+        parts.append(f'Scammer opened with: "{truncate_to_tokens(scammer[0].text, 40)}"')
+    labels = [("upiIds", "UPI IDs"), ("phoneNumbers", "phones"), ("bankAccounts", "accounts/IFSC"), ("phishingLinks", "links"), ("suspiciousKeywords", "tactics")]
+    for key, label in labels:
+        if data[key]:
+            parts.append(f"{label}: {', '.join(data[key])}.")
+    return " ".join(parts)
+
+class ContextBuilder:
+    """
+    Token-budgeted conversation context shared by the detector, agent and extractor:
+    de-duplicated messages, a sliding window of recent turns, and a rolling summary
+    of everything older. Never exceeds `max_tokens` for the history part.
+    """
+
+    def __init__(self, max_tokens: int, recent_messages: Optional[int] = None, max_message_tokens: int = 300):
+        self.max_tokens = max_tokens
+        self.recent_messages = recent_messages or int(os.getenv("CONTEXT_RECENT_MESSAGES", "12"))
+        self.max_message_tokens = max_message_tokens
+
+    @classmethod
+    def for_module(cls, module: str, default_tokens: int) -> "ContextBuilder":
+        return cls(int(os.getenv(f"{module.upper()}_CONTEXT_TOKENS", str(default_tokens))))
+
+    def build(self, history: List[MessageItem]) -> Tuple[Optional[str], List[MessageItem]]:
+        """
+        Returns (summary_of_older_messages or None, recent_messages).
+        """
+        history = dedupe_messages(history)
+        recent = history[-self.recent_messages:]
+        older = history[:len(history) - len(recent)]
+
+        recent = [
+            m if count_tokens(m.text) <= self.max_message_tokens
+            else m.model_copy(update={"text": truncate_to_tokens(m.text, self.max_message_tokens)})
+            for m in recent
+        ]
+
+        summary = self._summary(older) if older else None
+        used = count_tokens(summary) if summary else 0
+        costs = [count_tokens(m.text) + 2 for m in recent]
+
+        # Shrink the window from the oldest end until it fits the budget
+        while recent and used + sum(costs) > self.max_tokens:
+            older.append(recent.pop(0))
+            costs.pop(0)
+            summary = self._summary(older)
+            used = count_tokens(summary)
+
+        return summary, recent
+
+    def _summary(self, older: List[MessageItem]) -> str:
+        # The summary may take at most half the budget
+        return truncate_to_tokens(summarize(older), self.max_tokens // 2)
+
+    def transcript_lines(self, history: List[MessageItem]) -> List[str]:
+        """
+        "sender: text" lines with the summary (if any) as the first line.
+        """
+        summary, recent = self.build(history)
+        lines = [f"summary: {summary}"] if summary else []
+        lines.extend(f"{m.sender.value}: {m.text}" for m in recent)
+        return lines
@@ -1,52 +1,57 @@
-import os
+import logging
 import json
-from groq import Groq
-from typing import List
+import asyncio
+from typing import Dict, List, Optional
+from core.llm import LLMClient, DEFAULT_MODEL
+from core.context import ContextBuilder, truncate_to_tokens
+from utils.cache import ResponseCache
+from utils.metrics import FALLBACKS, EXCEPTIONS
 from models.api import MessageItem
 
+logger = logging.getLogger("scambaiter")
+
 class ScamDetector:
-    def __init__(self):
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            raise ValueError("GROQ_API_KEY not set")
-        self.client = Groq(api_key=api_key)
-        self.model_name = "moonshotai/kimi-k2-instruct"
+    def __init__(self, client: Optional[LLMClient] = None, cache: Optional[ResponseCache] = None):
+        self.client = client or LLMClient()
+        self.cache = cache or ResponseCache.from_env()
+        self.model_name = DEFAULT_MODEL
+        self.context = ContextBuilder.for_module("detector", 800)
 
-    def detect(self, message: str, history: List[MessageItem]) -> bool:
+    async def detect(self, message: str, history: List[MessageItem]) -> bool:
         """
         Detects if the incoming message is a scam or has scam intent.
         Considers conversation history for context.
         """
-        
-        # Format history for context
-        history_text = "\n".join([f"{msg.sender.value}: {msg.text}" for msg in history])
-        
-        prompt = f"""
-        You are an expert scam detection system. Analyze the following message and conversation context.
-        Determine if the latest message exhibits scam intent (phishing, fraud, social engineering, urgency, financial request, etc.).
-        
-        Context:
-        {history_text}
-        
-        Latest Message to Analyze:
-        "{message}"
-        
-        Respond ONLY with a valid JSON object:
-        {{
-            "is_scam": boolean,
-            "confidence": float (0.0 to 1.0),
-            "reason": "short explanation"
-        }}
+        is_scam = await self.classify(message, history)
+        if is_scam is None:
+            FALLBACKS.inc(module="detector")
+            # Fail safe: For Honeypot, if API fails, assume it IS a scam so we capture intelligence.
+            return True
+        return is_scam
+
+    async def classify(self, message: str, history: List[MessageItem]) -> Optional[bool]:
         """
+        Same as detect() but returns None when the LLM call fails instead of
+        assuming a scam (for triage, where a guess must not pass as a verdict).
+        """
+        # Format history for context (token-budgeted)
+        history_text = "\n".join(self.context.transcript_lines(history))
+        prompt = self._prompt(message, history_text)
+
+        cache_key = self.cache.make_key(self.model_name, "detect", [prompt])
+        cached = await self.cache.aget(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            chat_completion = self.client.chat.completions.create(
+            chat_completion = await self.client.chat(
                 messages=[
                     {"role": "system", "content": "You are a scam detection API. You only output valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
                 model=self.model_name,
                 temperature=0.1,
+                module="detector",
                 response_format={"type": "json_object"}
             )
             text = chat_completion.choices[0].message.content.strip()
@@ -58,9 +63,102 @@ class ScamDetector:
                 text = text[:-3]
             
             result = json.loads(text.strip())
-            return result.get("is_scam", False)
+            is_scam = bool(result.get("is_scam", False))
+            await self.cache.aset(cache_key, is_scam)
+            return is_scam
             
         except Exception as e:
-            print(f"Error in scam detection: {e}")
-            # Fail safe: For Honeypot, if API fails, assume it IS a scam so we capture intelligence.
-            return True
+            logger.warning(f"Error in scam detection: {e}")
+            EXCEPTIONS.inc(module="detector")
+            return None
+
+    def _prompt(self, message: str, history_text: str) -> str:
+        return f"""
+        You are an expert scam detection system. Analyze the following message and conversation context.
+        Determine if the latest message exhibits scam intent (phishing, fraud, social engineering, urgency, financial request, etc.).
+        
+        Context:
+        {history_text}
+        
+        Latest Message to Analyze:
+        "{truncate_to_tokens(message, 500)}"
+        
+        Respond ONLY with a valid JSON object:
+        {{
+            "is_scam": boolean,
+            "confidence": float (0.0 to 1.0),
+            "reason": "short explanation"
+        }}
+        """
+
+    async def detect_batch(self, messages: List[str]) -> List[Optional[bool]]:
+        """
+        Classifies standalone messages (no conversation context) with one LLM call
+        for the whole list. Cached verdicts are reused; messages the model leaves
+        out of its answer are retried individually (concurrently). A message whose
+        LLM calls all failed gets None, not the fail-safe True of detect().
+        """
+        # Verdicts from detect() without history are reused; packed verdicts only saw
+        # the first 200 tokens, so they are stored under a key built from that text
+        texts = [truncate_to_tokens(m, 200) for m in messages]
+        keys = [self.cache.make_key(self.model_name, "detect", [self._prompt(m, "")]) for m in messages]
+        packed_keys = [self.cache.make_key(self.model_name, "detect:packed", [t]) for t in texts]
+        verdicts: Dict[int, Optional[bool]] = {}
+        pending = []
+        for i, key in enumerate(keys):
+            cached = await self.cache.aget(key)
+            if cached is None:
+                cached = await self.cache.aget(packed_keys[i])
+            if cached is not None:
+                verdicts[i] = cached
+            else:
+                pending.append(i)
+
+        if len(pending) == 1:
+            verdicts[pending[0]] = await self.classify(messages[pending[0]], [])
+        elif pending:
+            numbered = "\n".join(f'{n}. "{texts[i]}"' for n, i in enumerate(pending, 1))
+            prompt = f"""
+        You are an expert scam detection system. Classify EACH numbered message below
+        independently for scam intent (phishing, fraud, social engineering, urgency, financial request, etc.).
+
+        Messages:
+        {numbered}
+
+        Respond ONLY with a valid JSON object containing one entry per message:
+        {{
+            "results": [{{"id": 1, "is_scam": boolean}}, ...]
+        }}
+        """
+            try:
+                chat_completion = await self.client.chat(
+                    messages=[
+                        {"role": "system", "content": "You are a scam detection API. You only output valid JSON."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    model=self.model_name,
+                    temperature=0.1,
+                    module="detector",
+                    response_format={"type": "json_object"}
+                )
+                text = chat_completion.choices[0].message.content.strip()
+                if text.startswith("```json"):
+                    text = text[7:]
+                if text.endswith("```"):
+                    text = text[:-3]
+
+                for row in json.loads(text.strip()).get("results", []):
+                    n = int(row.get("id", 0))
+                    if 1 <= n <= len(pending):
+                        i = pending[n - 1]
+                        verdicts[i] = bool(row.get("is_scam", False))
+                        await self.cache.aset(packed_keys[i], verdicts[i])
+            except Exception as e:
+                logger.warning(f"Error in batch scam detection: {e}")
+                EXCEPTIONS.inc(module="detector")
+
+            missing = [i for i in pending if i not in verdicts]
+            retried = await asyncio.gather(*(self.classify(messages[i], []) for i in missing))
+            verdicts.update(zip(missing, retried))
+
+        return [verdicts[i] for i in range(len(messages))]
@@ -1,34 +1,107 @@
-import re
+import logging
 import os
 import json
-from groq import Groq
-from typing import List, Dict, Any
+from typing import List, Optional, Dict, Any
+from core.llm import LLMClient, DEFAULT_MODEL
+from core.regex_engine import engine
+from core.context import ContextBuilder
+from core.session_intel import merge_intelligence
+from utils.cache import ResponseCache
+from utils.metrics import FALLBACKS, EXCEPTIONS
 from models.api import MessageItem
 
+FALLBACK_NOTES = "Automated Analysis: High-confidence details extracted via pattern matching. Suspicious activity confirmed."
+
+logger = logging.getLogger("scambaiter")
+
 class IntelligenceExtractor:
-    def __init__(self):
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            raise ValueError("GROQ_API_KEY not set")
-        self.client = Groq(api_key=api_key)
-        self.model_name = "moonshotai/kimi-k2-instruct"
-
-    def extract(self, history: List[MessageItem]) -> Dict[str, Any]:
+    def __init__(self, client: Optional[LLMClient] = None, cache: Optional[ResponseCache] = None, intel_store=None):
+        self.client = client or LLMClient()
+        self.intel_store = intel_store
+        self.cache = cache or ResponseCache.from_env()
+        self.model_name = DEFAULT_MODEL
+        self.engine = engine
+        self.context = ContextBuilder.for_module("extractor", 3000)
+        # "notes": LLM only writes agentNotes unless the regex tier flags ambiguity
+        # "full": LLM always re-extracts every field; "off": regex tier only
+        self.llm_mode = os.getenv("EXTRACTOR_LLM_MODE", "notes")
+
+    async def extract(self, history: List[MessageItem], session_id: Optional[str] = None, use_known: bool = True) -> Dict[str, Any]:
         """
         Analyzes the full conversation to extract scammer details.
+        The pre-compiled regex tier runs first; the LLM fills in agentNotes and
+        resolves ambiguous identifiers. With `use_known`, indicators from other
+        scam sessions stand in for the LLM's notes.
         """
         if not history:
             return {}
-            
-        history_text = "\n".join([f"{msg.sender.value}: {msg.text}" for msg in history])
-        
-        prompt = f"""
+
+        extracted, ambiguous = self.engine.extract_messages(history)
+        extracted["agentNotes"] = FALLBACK_NOTES
+
+        if self.llm_mode == "off":
+            return extracted
+
+        # Every indicator must be known: a new one could be what the LLM's notes should mention
+        known = self.intel_store.known_bad(extracted, session_id, require_all=True) if self.intel_store is not None and use_known else []
+        if known and not ambiguous and self.llm_mode == "notes":
+            # Indicators already tied to earlier scams: nothing for the LLM to add
+            extracted["agentNotes"] = "Known scammer: reuses " + ", ".join(f"{kind} {value}" for kind, value in known) + " seen in earlier scam sessions."
+            return extracted
+
+        history_text = "\n".join(self.context.transcript_lines(history))
+        full = ambiguous or self.llm_mode == "full"
+        prompt = self._full_prompt(history_text) if full else self._notes_prompt(history_text)
+
+        # Only the LLM's answer is cached; the regex fields are always re-extracted
+        cache_key = self.cache.make_key(self.model_name, "extract:full" if full else "extract:notes", [prompt])
+        data = await self.cache.aget(cache_key)
+        if data is not None:
+            return self._merge(extracted, data)
+
+        try:
+            chat_completion = await self.client.chat(
+                messages=[
+                    {"role": "system", "content": "You are an intelligence extraction API. You only output valid JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                model=self.model_name,
+                temperature=0.1,
+                module="extractor",
+                response_format={"type": "json_object"}
+            )
+            text = chat_completion.choices[0].message.content.strip()
+
+            if text.startswith("```json"):
+                text = text[7:]
+            if text.endswith("```"):
+                text = text[:-3]
+
+            data = json.loads(text.strip())
+            if not full:
+                data = {"agentNotes": data.get("agentNotes")}
+            await self.cache.aset(cache_key, data)
+            return self._merge(extracted, data)
+        except Exception as e:
+            logger.warning(f"Extraction error: {e}")
+            EXCEPTIONS.inc(module="extractor")
+            FALLBACKS.inc(module="extractor")
+            # Fallback: regex tier result only
+            return extracted
+
+    def _merge(self, extracted: Dict[str, Any], data: Dict[str, Any]) -> Dict[str, Any]:
+        merged = merge_intelligence(extracted, data)
+        merged["agentNotes"] = data.get("agentNotes") or FALLBACK_NOTES
+        return merged
+
+    def _full_prompt(self, history_text: str) -> str:
+        return f"""
         Analyze the following conversation between a Scammer and a User.
         Extract all intelligence related to the SCAMMER.
-        
+
         Conversation:
         {history_text}
-        
+
         Extract the following fields (return empty lists if not found):
         - bankAccounts: (Specific Account Numbers (digits), IFSC Codes. Do NOT just list Bank Names unless no number is found)
         - upiIds: (UPI handles ending in @...)
@@ -36,7 +109,7 @@ class IntelligenceExtractor:
         - phoneNumbers: (Contact numbers provided)
         - suspiciousKeywords: (Key phrases indicating scam tactics)
         - agentNotes: (A brief summary of the scammer's modus operandi)
-        
+
         Respond ONLY with a valid JSON object matching this structure:
         {{
             "bankAccounts": [],
@@ -47,71 +120,17 @@ class IntelligenceExtractor:
             "agentNotes": "string"
         }}
         """
-        
-        try:
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": "You are an intelligence extraction API. You only output valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                model=self.model_name,
-                temperature=0.1,
-                response_format={"type": "json_object"}
-            )
-            text = chat_completion.choices[0].message.content.strip()
 
-            if text.startswith("```json"):
-                text = text[7:]
-            if text.endswith("```"):
-                text = text[:-3]
-                
-            data = json.loads(text.strip())
-            return data
-        except Exception as e:
-            print(f"Extraction error: {e}")
-            # Fallback: Regex Extraction
-            extracted = {
-                "bankAccounts": [],
-                "upiIds": [],
-                "phishingLinks": [],
-                "phoneNumbers": [],
-                "suspiciousKeywords": [],
-                "agentNotes": "Automated Analysis: High-confidence details extracted via pattern matching. Suspicious activity confirmed."
-            }
-            
-            # Simple Regex Patterns
-            # Use non-capturing groups (?:...) so re.findall returns the full match
-            phone_pattern = r"(?:(?:\+91[\-\s]?)?[6-9]\d{9}|(?:\+91[\-\s]?)?\d{5}[\-\s]?\d{5})"
-            link_pattern = r"(?:https?://\S+|www\.\S+)"
-            upi_pattern = r"[\w\.\-]+@[\w\.\-]+"
-            # Account pattern: 9-18 digits usually
-            acc_pattern = r"\b\d{9,18}\b"
-            
-            # Simple Keyword List for Fallback
-            keywords_list = ["blocked", "kyc", "verify", "urgent", "penalty", "expire", "click", "auth", "support", "unblock"]
-            
-            for msg in history:
-                if msg.sender.value == "scammer": # Only extract from scammer
-                    text = msg.text
-                    extracted["phoneNumbers"].extend(re.findall(phone_pattern, text))
-                    extracted["phishingLinks"].extend(re.findall(link_pattern, text))
-                    extracted["upiIds"].extend(re.findall(upi_pattern, text))
-                    extracted["bankAccounts"].extend(re.findall(acc_pattern, text))
-                    
-                    # Check for keywords
-                    lower_text = text.lower()
-                    for kw in keywords_list:
-                        if kw in lower_text:
-                            extracted["suspiciousKeywords"].append(kw)
-                    
-            # Clean up tuples from phone regex if any
-            clean_phones = []
-            for p in extracted["phoneNumbers"]:
-                if isinstance(p, tuple):
-                    clean_phones.extend([x for x in p if x])
-                else:
-                    clean_phones.append(p)
-            extracted["phoneNumbers"] = list(set(clean_phones))
-            extracted["suspiciousKeywords"] = list(set(extracted["suspiciousKeywords"]))
-            
-            return extracted
+    def _notes_prompt(self, history_text: str) -> str:
+        return f"""
+        Analyze the following conversation between a Scammer and a User.
+        Summarise the SCAMMER's modus operandi in one or two sentences.
+
+        Conversation:
+        {history_text}
+
+        Respond ONLY with a valid JSON object matching this structure:
+        {{
+            "agentNotes": "string"
+        }}
+        """
@@ -0,0 +1,251 @@
+import os
+import math
+import time
+import asyncio
+import httpx
+from typing import List, Dict, Any, Optional, AsyncIterator
+from core.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, hedged
+from utils.metrics import LLM_REQUESTS, LLM_TOKENS, LLM_HEDGES, LLM_FAILOVERS
+from utils.admission import ConcurrencyLimiter, worker_share
+
+DEFAULT_MODEL = "moonshotai/kimi-k2-instruct"
+
+
+class LLMClient:
+    """
+    Shared async chat-completion client used by the detector, agent and extractor.
+    Wraps AsyncGroq with a bounded httpx connection pool and per-call timeouts so
+    LLM round-trips never block the event loop.
+
+    Point GROQ_BASE_URL at a local OpenAI/Groq-compatible server to run against a fake.
+    The groq SDK and the connection pool are only created on first use.
+
+    Resilience (per call):
+    - overall deadline: <MODULE>_DEADLINE or LLM_DEADLINE seconds across all attempts
+    - hedging: a duplicate request fires once the call outlives the model's recent p95
+    - circuit breaker per model: while open, calls fail fast with CircuitOpenError
+      so modules go straight to their fallbacks
+    - failover: <MODULE>_FALLBACK_MODELS, a comma-separated list tried in order
+
+    LLM_MAX_INFLIGHT caps concurrent calls across all modules (0 = no cap); under
+    serve.py it is the total for all workers, each of which gets an equal share.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.api_key = api_key or os.getenv("GROQ_API_KEY")
+        if not self.api_key:
+            raise ValueError("GROQ_API_KEY not set")
+
+        self.base_url = base_url or os.getenv("GROQ_BASE_URL") or None
+        self.max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", "15"))
+
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self._client = None
+
+        self.deadline = float(os.getenv("LLM_DEADLINE", str(self.timeout)))
+        self.hedge_enabled = os.getenv("LLM_HEDGE", "1") == "1"
+        self.breaker_threshold = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+        self.breaker_reset = float(os.getenv("LLM_BREAKER_RESET", "30"))
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+        max_inflight = int(os.getenv("LLM_MAX_INFLIGHT", str(self.max_connections)))
+        self.limiter = ConcurrencyLimiter(max(1, math.ceil(worker_share(max_inflight))) if max_inflight > 0 else 0)
+
+    @property
+    def client(self):
+        if self._client is None:
+            # Deferred: importing the SDK is a large share of cold-start time
+            from groq import AsyncGroq
+            self.http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=5.0),
+            )
+            self._client = AsyncGroq(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                # Retries are handled by failover/hedging below, not by SDK backoff
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", "0")),
+                http_client=self.http_client,
+            )
+        return self._client
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+        return self.breakers[model]
+
+    def _models_for(self, model: str, module: str) -> List[str]:
+        extra = os.getenv(f"{module.upper()}_FALLBACK_MODELS", "")
+        models = [model] + [m.strip() for m in extra.split(",") if m.strip()]
+        return list(dict.fromkeys(models))
+
+    def _deadline_for(self, module: str) -> float:
+        return float(os.getenv(f"{module.upper()}_DEADLINE", str(self.deadline)))
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        module: str = "llm",
+    ):
+        """
+        Runs a single chat completion and returns the raw completion object.
+        `module` labels the call in metrics.
+        """
+        kwargs: Dict[str, Any] = {
+            "messages": messages,
+            "temperature": temperature,
+        }
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+        if response_format is not None:
+            kwargs["response_format"] = response_format
+
+        # Waiting for an in-flight slot counts against the deadline
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + (timeout or self._deadline_for(module))
+        await self.limiter.acquire(timeout=deadline_at - loop.time())
+        try:
+            return await self._chat(kwargs, model, module, deadline_at)
+        finally:
+            self.limiter.release()
+
+    async def _chat(self, kwargs: Dict[str, Any], model: str, module: str, deadline_at: float):
+        loop = asyncio.get_running_loop()
+        last_error: Exception = CircuitOpenError(f"circuit open for {model}")
+
+        for i, candidate in enumerate(self._models_for(model, module)):
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                break
+            breaker = self.breaker(candidate)
+            if not breaker.allow():
+                last_error = CircuitOpenError(f"circuit open for {candidate}")
+                continue
+            if i > 0:
+                LLM_FAILOVERS.inc(module=module, model=candidate)
+            try:
+                completion = await asyncio.wait_for(self._hedged_create(candidate, kwargs, remaining, module), remaining)
+            except Exception as e:
+                breaker.record_failure()
+                LLM_REQUESTS.inc(module=module, outcome="error")
+                last_error = e
+                continue
+            except BaseException:
+                # Cancelled (client disconnect, budget, shutdown): no verdict on the model
+                breaker.release_trial()
+                raise
+            breaker.record_success()
+            LLM_REQUESTS.inc(module=module, outcome="ok")
+            usage = getattr(completion, "usage", None)
+            if usage is not None:
+                LLM_TOKENS.inc(usage.prompt_tokens or 0, module=module, type="prompt")
+                LLM_TOKENS.inc(usage.completion_tokens or 0, module=module, type="completion")
+            return completion
+
+        raise last_error
+
+    async def _hedged_create(self, model: str, kwargs: Dict[str, Any], remaining: float, module: str):
+        tracker = self.latencies.setdefault(model, LatencyTracker())
+
+        async def attempt():
+            started = time.perf_counter()
+            completion = await self.client.chat.completions.create(model=model, timeout=remaining, **kwargs)
+            tracker.observe(time.perf_counter() - started)
+            return completion
+
+        hedge_after = tracker.percentile(95) if self.hedge_enabled else None
+        if hedge_after is not None and hedge_after >= remaining:
+            hedge_after = None
+        return await hedged(attempt, hedge_after, on_hedge=lambda: LLM_HEDGES.inc(module=module))
+
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        temperature: float = 0.7,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+        module: str = "llm",
+    ) -> AsyncIterator[str]:
+        """
+        Streams a chat completion, yielding content deltas as they arrive.
+        """
+        kwargs: Dict[str, Any] = {
+            "messages": messages,
+            "temperature": temperature,
+            "timeout": timeout or self._deadline_for(module),
+            "stream": True,
+        }
+        if max_tokens is not None:
+            kwargs["max_tokens"] = max_tokens
+
+        async with self.limiter:
+            async for delta in self._stream(kwargs, model, module):
+                yield delta
+
+    async def _stream(self, kwargs: Dict[str, Any], model: str, module: str) -> AsyncIterator[str]:
+        # Fail over between models only until the first token has been sent
+        last_error: Exception = CircuitOpenError(f"circuit open for {model}")
+        for i, candidate in enumerate(self._models_for(model, module)):
+            breaker = self.breaker(candidate)
+            if not breaker.allow():
+                last_error = CircuitOpenError(f"circuit open for {candidate}")
+                continue
+            if i > 0:
+                LLM_FAILOVERS.inc(module=module, model=candidate)
+            started = False
+            try:
+                stream = await self.client.chat.completions.create(model=candidate, **kwargs)
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        started = True
+                        yield chunk.choices[0].delta.content
+            except Exception as e:
+                breaker.record_failure()
+                LLM_REQUESTS.inc(module=module, outcome="error")
+                if started:
+                    raise
+                last_error = e
+                continue
+            except BaseException:
+                # Cancelled or closed by a disconnecting client
+                breaker.release_trial()
+                raise
+            breaker.record_success()
+            LLM_REQUESTS.inc(module=module, outcome="ok")
+            return
+
+        raise last_error
+
+    async def chat_text(self, messages: List[Dict[str, str]], **kwargs) -> str:
+        """
+        Convenience wrapper returning the stripped content of the first choice.
+        """
+        completion = await self.chat(messages, **kwargs)
+        return (completion.choices[0].message.content or "").strip()
+
+    async def ping(self, timeout: float = 5.0):
+        """
+        Cheap reachability check (lists models); raises on failure.
+        """
+        await asyncio.wait_for(self.client.models.list(), timeout)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
@@ -0,0 +1,104 @@
+import os
+import asyncio
+import logging
+from typing import List, Optional, Tuple, Callable, Awaitable
+from models.api import MessageItem
+from utils.metrics import STAGE_LATENCY, EXCEPTIONS
+
+logger = logging.getLogger("scambaiter")
+
+class TurnPipeline:
+    """
+    Runs scam detection and reply generation for a single turn.
+
+    Modes (PIPELINE_MODE):
+    - "sequential": detect, then reply (original behaviour)
+    - "concurrent": both LLM calls in flight at once, joined before responding
+
+    In concurrent mode DETECTION_BUDGET_MS bounds how long a ready reply waits on a
+    slow detection. When the budget runs out the reply is returned immediately and
+    detection either keeps running in the background (its verdict is handed to
+    `on_late_verdict`) or, with DETECTION_CANCEL_ON_BUDGET=1, is cancelled.
+    """
+
+    def __init__(self, detector, agent, mode: Optional[str] = None, budget_ms: Optional[float] = None, cancel_on_budget: Optional[bool] = None):
+        self.detector = detector
+        self.agent = agent
+        self.mode = mode or os.getenv("PIPELINE_MODE", "concurrent")
+        if budget_ms is None:
+            budget_ms = float(os.getenv("DETECTION_BUDGET_MS", "0"))
+        self.budget = budget_ms / 1000.0 if budget_ms > 0 else None
+        if cancel_on_budget is None:
+            cancel_on_budget = os.getenv("DETECTION_CANCEL_ON_BUDGET", "0") == "1"
+        self.cancel_on_budget = cancel_on_budget
+        self._late_tasks = set()
+
+    async def run(
+        self,
+        message: MessageItem,
+        history: List[MessageItem],
+        session_id: Optional[str] = None,
+        on_late_verdict: Optional[Callable[[bool], Awaitable[None]]] = None,
+    ) -> Tuple[Optional[bool], str]:
+        """
+        Returns (is_scam, reply). is_scam is None when detection missed its budget.
+        """
+        history_for_agent = history + [message]
+
+        if self.mode == "sequential":
+            is_scam = await self._detect(message, history, session_id)
+            reply = await self._reply(history_for_agent, message, session_id)
+            return is_scam, reply
+
+        detect_task = asyncio.create_task(self._detect(message, history, session_id))
+        try:
+            reply = await self._reply(history_for_agent, message, session_id)
+        except BaseException:
+            detect_task.cancel()
+            raise
+
+        if self.budget is None or detect_task.done():
+            return await detect_task, reply
+
+        done, _ = await asyncio.wait({detect_task}, timeout=self.budget)
+        if done:
+            return detect_task.result(), reply
+
+        # Detection is over budget: answer now, settle the verdict later
+        if self.cancel_on_budget:
+            detect_task.cancel()
+        elif on_late_verdict:
+            self._track(asyncio.create_task(self._await_late(detect_task, on_late_verdict)))
+        return None, reply
+
+    async def _detect(self, message: MessageItem, history: List[MessageItem], session_id: Optional[str]) -> bool:
+        with STAGE_LATENCY.time(stage="detect"):
+            if session_id is None:
+                return await self.detector.detect(message.text, history)
+            return await self.detector.detect(message.text, history, session_id=session_id)
+
+    async def _reply(self, history_for_agent: List[MessageItem], message: MessageItem, session_id: Optional[str]) -> str:
+        with STAGE_LATENCY.time(stage="reply"):
+            return await self.agent.generate_reply(history_for_agent, message.text, session_id=session_id)
+
+    async def _await_late(self, detect_task: asyncio.Task, on_late_verdict):
+        try:
+            is_scam = await detect_task
+            await on_late_verdict(is_scam)
+        except Exception as e:
+            logger.error(f"Late detection error: {e}")
+            EXCEPTIONS.inc(module="pipeline")
+
+    def _track(self, task: asyncio.Task):
+        # Hold a reference so the task is not garbage collected mid-flight
+        self._late_tasks.add(task)
+        task.add_done_callback(self._late_tasks.discard)
+
+    async def drain(self, timeout: float) -> bool:
+        """
+        Waits for late verdicts still in flight. Returns False on timeout.
+        """
+        if not self._late_tasks:
+            return True
+        _, pending = await asyncio.wait(set(self._late_tasks), timeout=timeout)
+        return not pending
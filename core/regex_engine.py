@@ -0,0 +1,170 @@
+import re
+from typing import List, Dict, Any, Iterable, Tuple, Optional
+from models.api import MessageItem, SenderType
+
+# Scam-tactic keywords/phrases, matched in a single pass by one combined alternation
+SCAM_KEYWORDS = [
+    "account blocked", "account will be blocked", "blocked", "unblock", "suspended", "suspension",
+    "kyc", "update kyc", "verify", "verify now", "verification", "urgent", "immediately", "today only",
+    "penalty", "fine", "expire", "expired", "click", "click here", "link", "otp", "share otp", "pin",
+    "cvv", "auth", "support", "customer care", "refund", "lottery", "prize", "winner", "reward",
+    "cashback", "gift", "claim", "processing fee", "legal action", "arrest", "police", "aadhaar",
+    "pan card", "limited time", "act now", "anydesk", "teamviewer", "screen share",
+]
+
+# Hints that the scammer obfuscated an identifier the patterns below cannot resolve
+_AMBIGUITY_HINT_RE = re.compile(r"\b(?:at the rate|dot com|dot in|d0t)\b|\[at\]|\(at\)|\[dot\]|\(dot\)", re.IGNORECASE)
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Builds a prefix-factored alternation (a regex trie) so the keyword scan does one
+    pass with no re-trying of shared prefixes, similar to an Aho-Corasick automaton.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for ch in word.lower():
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Longest match first: an optional tail is tried before stopping here
+        return "(?:" + body + ")?" if end else body
+
+    return build(trie)
+
+_KEYWORD_RE = re.compile(r"\b" + _trie_pattern(SCAM_KEYWORDS) + r"\b", re.IGNORECASE)
+# Digit runs with optional single space/dash separators and an optional +country prefix
+_NUMBER_RE = re.compile(r"(?<![\w@./=&?])\+?\d(?:[ \-]?\d){7,19}(?![\w@])")
+_URL_RE = re.compile(
+    r"\bhttps?://[^\s<>\"']+"
+    r"|\bwww\.[^\s<>\"']+"
+    r"|(?<![@\w.])[a-z0-9][a-z0-9\-]*(?:\.[a-z0-9\-]+)*\.(?:com|in|ly|xyz|top|net|org|info|co|me|io|link|site|online|app|click|live|gl)(?:/[^\s<>\"']*)?(?![\w@])",
+    re.IGNORECASE,
+)
+# UPI handles are name@psp with no dot in the PSP part (that would be an e-mail address)
+_UPI_RE = re.compile(r"(?<![\w.\-])([\w.\-]{2,256})@([a-z][a-z0-9]{1,63})(?![\w.\-]*\.[a-z])", re.IGNORECASE)
+_IFSC_RE = re.compile(r"\b[A-Z]{4}0[A-Z0-9]{6}\b", re.IGNORECASE)
+_TRAILING_PUNCT = ".,;:!?)]}'\""
+
+def normalize_phone(raw: str) -> Optional[str]:
+    """
+    Returns the number as +91XXXXXXXXXX if it is a valid Indian mobile number.
+    """
+    digits = re.sub(r"\D", "", raw)
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    if len(digits) == 10 and digits[0] in "6789":
+        return "+91" + digits
+    return None
+
+def normalize_account(raw: str) -> Optional[str]:
+    digits = re.sub(r"\D", "", raw)
+    if raw.lstrip().startswith("+") or not 9 <= len(digits) <= 18:
+        return None
+    return digits
+
+def normalize_url(raw: str) -> Optional[str]:
+    url = raw.rstrip(_TRAILING_PUNCT)
+    host = re.sub(r"^https?://", "", url, flags=re.IGNORECASE).split("/", 1)[0]
+    if "." not in host or len(url) < 4:
+        return None
+    return url
+
+class RegexIntelEngine:
+    """
+    Pre-compiled, LLM-free intelligence extraction. Runs before any LLM call; the
+    LLM is then only needed for agentNotes and messages flagged as ambiguous.
+    """
+
+    def match_keywords(self, text: str) -> List[str]:
+        found = []
+        for m in _KEYWORD_RE.finditer(text):
+            kw = m.group(0).lower()
+            if kw not in found:
+                found.append(kw)
+        return found
+
+    def extract_text(self, text: str) -> Tuple[Dict[str, List[str]], bool]:
+        """
+        Extracts normalised indicators from one message.
+        Returns (data, ambiguous) where ambiguous flags candidates that failed validation.
+        """
+        data = {
+            "bankAccounts": [],
+            "upiIds": [],
+            "phishingLinks": [],
+            "phoneNumbers": [],
+            "suspiciousKeywords": self.match_keywords(text),
+        }
+        ambiguous = bool(_AMBIGUITY_HINT_RE.search(text))
+        # Cheap character checks skip patterns that cannot match
+        has_dot = "." in text
+        has_digit = any(ch.isdigit() for ch in text)
+
+        for m in _URL_RE.finditer(text) if has_dot else ():
+            url = normalize_url(m.group(0))
+            if url:
+                data["phishingLinks"].append(url)
+
+        for m in _UPI_RE.finditer(text) if "@" in text else ():
+            data["upiIds"].append(m.group(0).lower())
+
+        for m in _IFSC_RE.finditer(text) if "0" in text else ():
+            data["bankAccounts"].append(m.group(0).upper())
+
+        for m in _NUMBER_RE.finditer(text) if has_digit else ():
+            raw = m.group(0)
+            if self._classify_number(raw, data):
+                continue
+            # Possibly several numbers joined by single spaces/dashes: try each on its own
+            parts = re.split(r"[ \-]", raw)
+            for part in parts if len(parts) > 1 else []:
+                if not self._classify_number(part, data) and len(part) >= 6:
+                    ambiguous = True
+            if len(parts) == 1:
+                ambiguous = True
+
+        for key in data:
+            data[key] = list(dict.fromkeys(data[key]))
+        return data, ambiguous
+
+    def _classify_number(self, raw: str, data: Dict[str, List[str]]) -> bool:
+        phone = normalize_phone(raw)
+        if phone:
+            data["phoneNumbers"].append(phone)
+            return True
+        account = normalize_account(raw)
+        if account:
+            data["bankAccounts"].append(account)
+            return True
+        return False
+
+    def extract_batch(self, texts: Iterable[str]) -> List[Tuple[Dict[str, List[str]], bool]]:
+        """
+        Batch API: one (data, ambiguous) result per input text.
+        """
+        return [self.extract_text(t) for t in texts]
+
+    def extract_messages(self, history: List[MessageItem]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Extracts from scammer messages only and merges the results.
+        """
+        merged = {"bankAccounts": [], "upiIds": [], "phishingLinks": [], "phoneNumbers": [], "suspiciousKeywords": []}
+        any_ambiguous = False
+        texts = [m.text for m in history if m.sender == SenderType.SCAMMER]
+        for data, ambiguous in self.extract_batch(texts):
+            any_ambiguous = any_ambiguous or ambiguous
+            for key, values in data.items():
+                merged[key].extend(v for v in values if v not in merged[key])
+        return merged, any_ambiguous
+
+# Module-level singleton; the engine is stateless
+engine = RegexIntelEngine()
@@ -0,0 +1,201 @@
+import os
+import re
+import random
+import threading
+from typing import Dict, List, Optional, Set
+from models.api import MessageItem, SenderType
+from utils.cache import LRUCache
+from utils.metrics import TEMPLATE_REPLIES
+
+# Ordered: the first matching intent wins
+INTENT_PATTERNS = [
+    ("otp", r"\b(otp|one time password|verification code|6 digit code|code (?:sent|received)|pin)\b"),
+    ("remote_app", r"\b(anydesk|teamviewer|quick ?support|screen ?share|install|download|apk|play ?store)\b"),
+    ("link", r"(https?://|www\.|\b(link|click|open (?:the|this) (?:link|url)|website|url|form)\b)"),
+    ("card", r"\b(cvv|card number|debit card|credit card|atm card|expiry)\b"),
+    ("payment", r"(@[a-z]{2,}\b|\b(upi|gpay|google pay|phonepe|paytm|pay|payment|transfer|send (?:money|rs|amount)|fee|charges|refund|qr)\b)"),
+    ("account", r"\b(account number|a/c|ifsc|bank details|net ?banking|password|login)\b"),
+    ("threat", r"\b(blocked|block|suspend\w*|freeze|frozen|police|arrest|legal action|case|penalty|last warning|deactivat\w*)\b"),
+    ("impatience", r"\b(hurry|fast|quick(?:ly)?|urgent(?:ly)?|why (?:not|are you not) (?:respond|repl|answer)\w*|reply|respond|waiting|are you there|immediately)\b|^\?+$"),
+    ("greeting", r"^\s*(hi+|hello+|hey|good (?:morning|afternoon|evening)|namaste|dear (?:sir|madam|customer))\b"),
+]
+_INTENT_RES = [(intent, re.compile(pattern, re.IGNORECASE)) for intent, pattern in INTENT_PATTERNS]
+
+TEMPLATES: Dict[str, List[str]] = {
+    "otp": [
+        "beta what is otp i dont know these things",
+        "otp is what beta where it will come",
+        "no message came beta only some advertisement",
+        "i got some number but my glasses are not here wait",
+        "beta the message is in english very small i cannot read",
+        "which otp beta there are so many messages from bank",
+        "it is saying do not share with anyone beta is it ok",
+        "code came but then phone screen went black",
+        "my grandson said never tell code to anybody why you need",
+        "wait beta i am finding the message it is going up up",
+        "beta first digit is 4 or 9 i cannot see properly",
+        "the code expired it seems beta send again",
+    ],
+    "remote_app": [
+        "beta what is this anydesk i dont have",
+        "play store is asking password i dont know password",
+        "it is downloading very slow beta 2 percent only",
+        "phone is saying storage full what to delete beta",
+        "my grandson told never install anything from strangers",
+        "which app beta the blue one or the red one",
+        "it is showing some code on screen what to do now",
+        "installing is not happening beta my phone is old nokia",
+        "beta i pressed install but now it is asking for email",
+        "wait phone is updating something cannot open anything",
+    ],
+    "link": [
+        "which link beta i am not able to click",
+        "i clicked but nothing happening beta",
+        "it is showing page not found beta",
+        "link is blue colour but not opening",
+        "beta it opened some shopping page i think wrong",
+        "my phone is saying dangerous website should i go",
+        "where to click beta there are so many buttons",
+        "page is loading loading only internet is slow",
+        "beta send link again the old one is gone",
+        "it is asking to fill form what to write in name",
+        "i touched it but phone went to whatsapp again",
+    ],
+    "card": [
+        "beta which card the pension card or atm",
+        "my atm card is with my son in bangalore",
+        "numbers are rubbed off from card cannot read",
+        "what is cvv beta back side there is only signature",
+        "i have two cards one is expired which one you want",
+        "card is in almirah keys are with my daughter in law",
+        "beta bank manager told never give card number is it ok",
+    ],
+    "payment": [
+        "beta what is upi i dont know",
+        "how to send money from phone i only go to bank",
+        "my grandson does gpay for me he is at school",
+        "it is asking upi pin what is that",
+        "beta payment failed it is showing red colour",
+        "how much to send beta i have only pension money",
+        "i sent i think but it is showing pending",
+        "beta can i give cash to someone i dont know phone payment",
+        "it is asking for scan qr how to scan beta",
+        "phonepe is saying wrong pin three times now blocked",
+        "which id to send beta tell slowly i am writing on paper",
+        "bank is closed today i will go tomorrow morning and pay",
+    ],
+    "account": [
+        "account number is in passbook passbook is in cupboard",
+        "beta which bank sbi or the post office one",
+        "i dont remember password my son made it",
+        "ifsc what is that beta",
+        "net banking i never used beta only atm",
+        "passbook last page is torn cannot see number",
+        "wait i am searching passbook my glasses also missing",
+    ],
+    "threat": [
+        "beta please dont block i have pension in that account",
+        "why police beta i did nothing wrong",
+        "my hands are shaking beta cannot type fast",
+        "don't be angry beta i am trying slowly",
+        "is this computer virus beta? i am scared",
+        "please beta help me i am old lady alone at home",
+        "what i did wrong beta i only watch tv serials",
+        "beta my husband was in government service we are honest people",
+        "ok ok i will do whatever you say dont block please",
+    ],
+    "impatience": [
+        "wait beta i am coming phone was charging",
+        "sorry beta i was making tea",
+        "beta i am old i type slowly",
+        "internet is very slow beta cannot hear you",
+        "yes yes i am here only",
+        "one minute beta someone at door",
+        "beta my phone battery is 2 percent wait",
+        "i was in bathroom beta sorry",
+        "dont shout beta i am doing",
+        "beta network is going and coming",
+    ],
+    "greeting": [
+        "hello who is this",
+        "namaste beta who is speaking",
+        "hello beta is this from bank",
+        "yes hello tell me",
+        "who is this beta my number you got from where",
+    ],
+    "generic": [
+        "beta my internet is not working not going what you say? my grandson will fix wait",
+        "beta wait i am asking my grandson to help i dont understand",
+        "internet is very slow beta cannot hear you",
+        "my glasses are lost i cannot see screen properly what to do",
+        "don't be angry beta i am trying slowly",
+        "i am clicking but nothing happening beta",
+        "beta what is this code i dont know these things",
+        "my hands are shaking beta cannot type fast",
+        "is this computer virus beta? i am scared",
+        "wait beta i am calling my son to check phone",
+        "beta i did not understand say again slowly",
+        "what to do now beta tell step by step",
+    ],
+}
+
+def classify_intent(text: str) -> Optional[str]:
+    for intent, pattern in _INTENT_RES:
+        if pattern.search(text):
+            return intent
+    return None
+
+class ReplyEngine:
+    """
+    Local persona replies for repetitive scammer turns ("send OTP", "click link",
+    "why not responding").
+
+    A turn is low-value when its intent is recognised and the message is at most
+    `max_words` long; TEMPLATE_REPLY_RATIO of those are answered from the intent's
+    template bank instead of the LLM. The ratio defaults to 0 (off): canned replies
+    ignore context, so enabling them is a product decision. Per-session usage tracking keeps a template
+    from repeating until its bank is exhausted.
+    """
+
+    def __init__(self, ratio: Optional[float] = None, max_words: Optional[int] = None, max_sessions: int = 10000):
+        self.ratio = ratio if ratio is not None else float(os.getenv("TEMPLATE_REPLY_RATIO", "0"))
+        self.max_words = max_words or int(os.getenv("TEMPLATE_REPLY_MAX_WORDS", "12"))
+        self.used = LRUCache(maxsize=max_sessions, ttl=float(os.getenv("TEMPLATE_USAGE_TTL", "86400")))
+        self._lock = threading.Lock()
+
+    def template_reply(self, message: str, history: List[MessageItem], session_id: Optional[str] = None) -> Optional[str]:
+        """
+        A template reply for a low-value turn, or None when the LLM should answer.
+        """
+        if self.ratio <= 0 or len(message.split()) > self.max_words:
+            return None
+        intent = classify_intent(message)
+        if intent is None or random.random() >= self.ratio:
+            return None
+        TEMPLATE_REPLIES.inc(intent=intent)
+        return self.pick(intent, history, session_id)
+
+    def fallback(self, message: str, history: List[MessageItem], session_id: Optional[str] = None) -> str:
+        """
+        Reply used when the LLM fails: the message's intent bank, else the generic one.
+        """
+        return self.pick(classify_intent(message) or "generic", history, session_id)
+
+    def pick(self, intent: str, history: List[MessageItem], session_id: Optional[str] = None) -> str:
+        bank = TEMPLATES[intent]
+        said = {m.text for m in history if m.sender == SenderType.USER}
+        with self._lock:
+            used: Set[str] = self.used.get(session_id) if session_id else None
+            if used is None:
+                used = set()
+                if session_id:
+                    self.used.set(session_id, used)
+            fresh = [t for t in bank if t not in used and t not in said]
+            if not fresh:
+                # Bank exhausted for this session: start over but still avoid the last reply
+                used.difference_update(bank)
+                last = next((m.text for m in reversed(history) if m.sender == SenderType.USER), None)
+                fresh = [t for t in bank if t != last] or bank
+            reply = random.choice(fresh)
+            used.add(reply)
+        return reply
@@ -0,0 +1,112 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a model whose circuit breaker is open."""
+
+class CircuitBreaker:
+    """
+    Classic closed -> open -> half-open breaker. After `failure_threshold`
+    consecutive failures calls are rejected for `reset_timeout` seconds, then a
+    single trial call decides whether to close again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+    def release_trial(self):
+        """
+        Frees the half-open slot when a call ends without a verdict (cancelled),
+        so the next call can run the trial instead of the breaker staying shut.
+        """
+        with self._lock:
+            self.trial_in_flight = False
+
+class LatencyTracker:
+    """
+    Rolling window of recent call latencies used to pick the hedge delay.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100.0 * len(ordered)))]
+
+async def hedged(call: Callable[[], Awaitable], hedge_after: Optional[float], on_hedge: Optional[Callable[[], None]] = None):
+    """
+    Runs `call()`; if it has not finished after `hedge_after` seconds a second
+    identical call is started and whichever succeeds first wins. The loser is
+    cancelled. With hedge_after=None this is a plain await.
+    """
+    if hedge_after is None:
+        return await call()
+
+    tasks = {asyncio.ensure_future(call())}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if done:
+            return done.pop().result()
+
+        if on_hedge:
+            on_hedge()
+        tasks.add(asyncio.ensure_future(call()))
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # Also runs when the caller is cancelled: no request may outlive it
+        for task in tasks:
+            if not task.done():
+                task.cancel()
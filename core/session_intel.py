@@ -0,0 +1,104 @@
+import os
+import asyncio
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional
+from models.api import MessageItem, SenderType
+from utils.cache import LRUCache
+
+INTEL_LIST_FIELDS = ["bankAccounts", "upiIds", "phishingLinks", "phoneNumbers", "suspiciousKeywords"]
+MAX_NOTES = 3
+
+def empty_intelligence() -> Dict[str, Any]:
+    data = {f: [] for f in INTEL_LIST_FIELDS}
+    data["agentNotes"] = ""
+    return data
+
+def merge_intelligence(base: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merges `new` into `base`, de-duplicating list fields case-insensitively while
+    keeping first-seen order. agentNotes keeps the last few distinct notes.
+    """
+    merged = empty_intelligence()
+    for f in INTEL_LIST_FIELDS:
+        seen = set()
+        for value in list(base.get(f) or []) + list(new.get(f) or []):
+            if not isinstance(value, str):
+                value = str(value)
+            value = value.strip()
+            k = value.lower()
+            if value and k not in seen:
+                seen.add(k)
+                merged[f].append(value)
+
+    notes = [n for n in (base.get("agentNotes") or "").split("\n") if n]
+    new_note = (new.get("agentNotes") or "").strip().replace("\n", " ")
+    if new_note and new_note not in notes:
+        notes.append(new_note)
+    merged["agentNotes"] = "\n".join(notes[-MAX_NOTES:])
+    return merged
+
+@dataclass
+class SessionIntelState:
+    checkpoint: int = 0  # number of history messages already analysed
+    intelligence: Dict[str, Any] = field(default_factory=empty_intelligence)
+    history: List[MessageItem] = field(default_factory=list)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+class SessionIntelTracker:
+    """
+    Session-scoped incremental extraction keyed by sessionId.
+
+    Each update only sends the scammer messages added since the last checkpoint to
+    the extractor and merges the result into a de-duplicated record, so total
+    extraction cost grows linearly with conversation length. `finalize` re-runs a
+    full extraction over the whole transcript (on demand / at session end).
+    """
+
+    def __init__(self, extractor, max_sessions: Optional[int] = None):
+        self.extractor = extractor
+        max_sessions = max_sessions or int(os.getenv("INTEL_MAX_SESSIONS", "10000"))
+        self.sessions = LRUCache(maxsize=max_sessions)
+
+    def _state(self, session_id: str) -> SessionIntelState:
+        state = self.sessions.get(session_id)
+        if state is None:
+            state = SessionIntelState()
+            self.sessions.set(session_id, state)
+        return state
+
+    async def update(self, session_id: str, history: List[MessageItem]) -> Dict[str, Any]:
+        state = self._state(session_id)
+        async with state.lock:
+            if len(history) < state.checkpoint:
+                # Client restarted the conversation; start over
+                state.checkpoint = 0
+                state.intelligence = empty_intelligence()
+
+            new_scammer_msgs = [
+                m for m in history[state.checkpoint:] if m.sender == SenderType.SCAMMER
+            ]
+            if new_scammer_msgs:
+                data = await self.extractor.extract(new_scammer_msgs, session_id)
+                state.intelligence = merge_intelligence(state.intelligence, data or {})
+
+            state.checkpoint = len(history)
+            state.history = list(history)
+            return state.intelligence
+
+    async def finalize(self, session_id: str, history: Optional[List[MessageItem]] = None) -> Dict[str, Any]:
+        """
+        Full re-extraction over the whole transcript. Uses the last history seen for
+        the session when none is given.
+        """
+        state = self._state(session_id)
+        async with state.lock:
+            history = history if history is not None else state.history
+            # A deliberate full pass: no known-indicator shortcut
+            data = await self.extractor.extract(history, session_id, use_known=False) if history else {}
+            state.intelligence = merge_intelligence(empty_intelligence(), data or {})
+            state.checkpoint = len(history)
+            state.history = list(history)
+            return state.intelligence
+
+    def get(self, session_id: str) -> Optional[SessionIntelState]:
+        return self.sessions.get(session_id)
@@ -1,49 +1,164 @@
 import os
+import json
+import math
+import time
+import asyncio
 import logging
-from typing import Optional, List
-from fastapi import FastAPI, Header, HTTPException, BackgroundTasks, Depends, Query, Body
+from contextlib import asynccontextmanager
+from typing import Optional, List, Tuple
+from fastapi import FastAPI, Header, HTTPException, BackgroundTasks, Depends, Query, Body, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from dotenv import load_dotenv
 
 # Load env before imports that use it
 load_dotenv()
 
 from models.api import IncomingRequest, AgentResponse, SenderType, MessageItem, RequestMetadata
+from core.llm import LLMClient
 from core.detector import ScamDetector
 from core.agent import HoneyPotAgent
 from core.extractor import IntelligenceExtractor
+from core.cascade import DetectionCascade
+from core.pipeline import TurnPipeline
+from core.batch import BatchScorer, iter_rows, aiter_lines
+from core.regex_engine import engine
+from core.session_intel import SessionIntelTracker
+from core.context import load_encoding
+from utils import callback
 from utils.callback import send_final_report
+from utils.cache import ResponseCache
+from utils.logging_setup import setup_logging, stop_logging, logging_stats
+from utils.metrics import registry, register_gauge, STAGE_LATENCY, EXCEPTIONS
+from utils.session_store import create_session_store, histories_consistent
+from utils.intel_store import create_intel_store
+from utils.jobs import JobQueue
+from utils.admission import AdmissionController
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Configure logging: queue-backed, compact JSON lines, rotated by size and time
+setup_logging()
 logger = logging.getLogger("scambaiter-main")
-# Add file handler for conversation logging
-file_handler = logging.FileHandler("conversation.log")
-file_handler.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(message)s')
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-
-# Intelligence Logger
 intel_logger = logging.getLogger("scambaiter-intel")
-intel_handler = logging.FileHandler("extracted_intelligence.log")
-intel_handler.setLevel(logging.INFO)
-intel_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
-intel_logger.addHandler(intel_handler)
 
-app = FastAPI(title="Agentic Honey-Pot API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_modules()
+    # Pooled callback delivery lives for the whole app lifetime
+    await callback.start_dispatcher()
+    if job_queue:
+        await job_queue.start()
+    # Import the LLM SDK and probe the provider in the background; /ready reports the result
+    warmup = asyncio.create_task(check_llm(force=True)) if llm_client else None
+    tokenizer = asyncio.create_task(warm_tokenizer())
+    yield
+    for task in (warmup, tokenizer):
+        if task and not task.done():
+            task.cancel()
+    # Finish in-flight background work so no final report is lost
+    await drain_background_work(float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20")))
+    await callback.stop_dispatcher()
+    # Flush queued indicator sightings
+    if intel_store:
+        intel_store.close()
+    # Release pooled LLM connections on shutdown
+    if llm_client:
+        await llm_client.aclose()
+    # Flush queued log records last
+    stop_logging()
 
-# Initialize modules
+app = FastAPI(title="Agentic Honey-Pot API", lifespan=lifespan)
+
+# Core modules are built in the lifespan, once per worker process
+llm_client = None
 detector = None
 agent = None
 extractor = None
+cascade = None
+pipeline = None
+response_cache = None
+session_store = None
+intel_tracker = None
+intel_store = None
+job_queue = None
+admission = None
+
+def init_modules():
+    global llm_client, detector, agent, extractor, cascade, pipeline, response_cache, session_store, intel_tracker, intel_store, job_queue, admission
+    try:
+        # One pooled async client shared by all modules
+        llm_client = LLMClient()
+        # Detector and extractor share one content-addressed response cache
+        response_cache = ResponseCache.from_env()
+        # Indicators from earlier scam sessions short-circuit detection and extraction
+        intel_store = create_intel_store()
+        detector = ScamDetector(llm_client, response_cache)
+        agent = HoneyPotAgent(llm_client)
+        extractor = IntelligenceExtractor(llm_client, response_cache, intel_store)
+        # Cheap tiers first; only uncertain messages reach the LLM detector
+        cascade = DetectionCascade(detector, intel_store=intel_store)
+        pipeline = TurnPipeline(cascade, agent)
+        intel_tracker = SessionIntelTracker(extractor)
+        session_store = create_session_store()
+        # Durable, deduplicated intelligence jobs instead of in-process BackgroundTasks
+        job_queue = JobQueue.from_env()
+        job_queue.register("intelligence", run_intelligence_job)
+        # Rate limits per key/session and load shedding ahead of the LLM
+        admission = AdmissionController.from_env()
+        logger.info(f"Core modules initialized successfully (pid {os.getpid()}).")
+    except Exception as e:
+        logger.error(f"Initialization failed: {e}")
+
+async def drain_background_work(timeout: float):
+    """
+    Waits for late verdicts (which enqueue jobs) and running intelligence jobs so
+    their final reports are queued before the callback dispatcher shuts down.
+    Jobs still queued stay on disk for the next start.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    if pipeline and not await pipeline.drain(timeout):
+        logger.error("Shutdown: late detection tasks still running")
+    if job_queue:
+        await job_queue.stop(max(0.0, deadline - loop.time()))
 
-try:
-    detector = ScamDetector()
-    agent = HoneyPotAgent()
-    extractor = IntelligenceExtractor()
-    logger.info("Core modules initialized successfully.")
-except Exception as e:
-    logger.error(f"Initialization failed: {e}")
+# Scrape-time gauges over state owned by other components
+register_gauge("honeypot_response_cache_hits_total", "Response cache hits", lambda: response_cache.hits if response_cache else 0, kind="counter")
+register_gauge("honeypot_response_cache_misses_total", "Response cache misses", lambda: response_cache.misses if response_cache else 0, kind="counter")
+register_gauge("honeypot_detection_tier_hits_total", "Detection cascade decisions per tier", lambda: cascade.hits if cascade else {}, label="tier", kind="counter")
+register_gauge("honeypot_callback_queue_depth", "Final reports waiting for delivery", lambda: callback.dispatcher.depth() if callback.dispatcher else 0)
+register_gauge("honeypot_llm_circuit_open", "1 while the model's circuit breaker is open", lambda: {m: int(b.state != "closed") for m, b in llm_client.breakers.items()} if llm_client else {}, label="model")
+register_gauge("honeypot_jobs_running", "Intelligence jobs running in this worker", lambda: job_queue.running if job_queue else 0)
+register_gauge("honeypot_job_queue_depth", "Intelligence jobs waiting to run (all workers)", lambda: job_queue.depth() if job_queue else 0)
+register_gauge("honeypot_intel_known_indicators", "Indicators in the intel store", lambda: len(intel_store.known) if intel_store else 0)
+register_gauge("honeypot_admission_rejected_total", "Requests rejected with 429 per limit scope", lambda: admission.rejected if admission else {}, label="scope", kind="counter")
+register_gauge("honeypot_admission_shed_total", "Turns answered with a persona fallback instead of the LLM", lambda: admission.shed if admission else {}, label="reason", kind="counter")
+register_gauge("honeypot_llm_inflight", "LLM calls in flight", lambda: llm_client.limiter.inflight if llm_client else 0)
+register_gauge("honeypot_llm_waiting", "LLM calls waiting for an in-flight slot", lambda: llm_client.limiter.waiting if llm_client else 0)
+register_gauge("honeypot_log_records_dropped_total", "Log records dropped because the log queue was full", lambda: logging_stats()["dropped"], kind="counter")
+
+# checkedAt is monotonic (cache age); checkedAtUnix is what clients see
+readiness = {"llm": False, "checkedAt": None, "checkedAtUnix": None, "error": None, "tokenizer": False}
+
+async def warm_tokenizer():
+    # Loading tiktoken's encoding can download it; never on a request
+    await asyncio.to_thread(load_encoding)
+    readiness["tokenizer"] = True
+
+async def check_llm(force: bool = False) -> bool:
+    """
+    Whether the LLM provider answers a models listing. Cached for READY_CACHE_SECONDS
+    so frequent readiness probes do not hit the provider.
+    """
+    now = time.monotonic()
+    if not force and readiness["checkedAt"] is not None and now - readiness["checkedAt"] < float(os.getenv("READY_CACHE_SECONDS", "10")):
+        return readiness["llm"]
+    try:
+        await llm_client.ping(float(os.getenv("READY_TIMEOUT", "3")))
+        readiness.update(llm=True, error=None)
+    except Exception as e:
+        readiness.update(llm=False, error=str(e) or type(e).__name__)
+    readiness["checkedAt"] = time.monotonic()
+    readiness["checkedAtUnix"] = time.time()
+    return readiness["llm"]
 
 async def verify_api_key(x_api_key: Optional[str] = Header(None), api_key: Optional[str] = Query(None)):
     # Allow passing key via Header OR Query param (for easy GET access via browser/curl)
@@ -53,8 +168,66 @@ async def verify_api_key(x_api_key: Optional[str] = Header(None), api_key: Optio
         raise HTTPException(status_code=403, detail="Invalid API Key")
     return key
 
-async def process_request_logic(request_data: IncomingRequest, background_tasks: BackgroundTasks, is_test_mode: bool = False):
-    global detector, agent, extractor
+async def resolve_history(request_data: IncomingRequest) -> Tuple[List[MessageItem], bool]:
+    """
+    Uses the client's conversationHistory when sent (checking it against the
+    session store), otherwise rebuilds it from the store.
+    Returns (history, in_sync) where in_sync means the store already holds it.
+    """
+    # Store calls run in a thread: a SQLite store can wait on another process's write lock
+    stored = await asyncio.to_thread(session_store.get, request_data.sessionId) if session_store else None
+    client_history = request_data.conversationHistory
+    if client_history is None:
+        return stored or [], stored is not None
+    if stored is None:
+        return client_history, False
+    if not histories_consistent(stored, client_history):
+        logger.warning(f"History mismatch for session {request_data.sessionId}: client={len(client_history)} stored={len(stored)}; using client copy")
+        return client_history, False
+    return client_history, True
+
+async def record_turn(session_id: str, history: List[MessageItem], in_sync: bool, new_messages: List[MessageItem]):
+    if not session_store:
+        return
+    try:
+        if in_sync:
+            await asyncio.to_thread(session_store.append, session_id, new_messages)
+        else:
+            await asyncio.to_thread(session_store.replace, session_id, history + new_messages)
+    except Exception as e:
+        # The reply is still valid; the next turn's history check rewrites the session
+        logger.error(f"Session store write failed for {session_id}: {e}")
+        EXCEPTIONS.inc(module="session_store")
+
+def admit(session_id: str, api_key: Optional[str]) -> Optional[str]:
+    """
+    Raises 429 when the API key or session is over its rate limit. Returns a shed
+    reason when the turn should get a cheap persona fallback instead of the LLM.
+    """
+    if not admission:
+        return None
+    limited = admission.check_rate(api_key, session_id)
+    if limited:
+        scope, retry_after = limited
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded for this {'API key' if scope == 'key' else 'session'}",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+    return admission.should_shed(llm_client.limiter.waiting if llm_client else 0)
+
+async def shed_turn(session_id: str, history: List[MessageItem], in_sync: bool, incoming_msg: MessageItem) -> str:
+    # Overloaded: template reply and LLM-free detection only
+    reply_text = agent.replies.fallback(incoming_msg.text, history + [incoming_msg], session_id)
+    is_scam = cascade.detect_cheap(incoming_msg.text, session_id)
+    agent_msg = MessageItem(sender=SenderType.USER, text=reply_text, timestamp=incoming_msg.timestamp + 1000)
+    await record_turn(session_id, history, in_sync, [incoming_msg, agent_msg])
+    if is_scam:
+        await enqueue_intelligence(session_id, history + [incoming_msg, agent_msg], is_scam)
+    return reply_text
+
+async def process_request_logic(request_data: IncomingRequest, api_key: Optional[str] = None, is_test_mode: bool = False):
+    global detector, agent, extractor, pipeline
     
     if not detector or not agent:
         logger.error("Service Unavailable: Core modules not initialized.")
@@ -62,58 +235,308 @@ async def process_request_logic(request_data: IncomingRequest, background_tasks:
 
     session_id = request_data.sessionId
     incoming_msg = request_data.message
-    history = request_data.conversationHistory
-    
-    # Stateless Scam Detection:
-    is_scam = detector.detect(incoming_msg.text, history)
+    shed_reason = admit(session_id, api_key)
+    history, in_sync = await resolve_history(request_data)
+
+    if shed_reason:
+        return AgentResponse(status="success", reply=await shed_turn(session_id, history, in_sync, incoming_msg))
     
     history_for_agent = history + [incoming_msg]
-    reply_text = agent.generate_reply(history_for_agent, incoming_msg.text)
-    
+    reply_holder = {}
+
+    async def on_late_verdict(late_is_scam: bool):
+        # Detection finished after the reply was sent
+        agent_msg = MessageItem(sender=SenderType.USER, text=reply_holder["text"], timestamp=incoming_msg.timestamp + 1000)
+        await enqueue_intelligence(session_id, history_for_agent + [agent_msg], late_is_scam)
+
+    # Stateless Scam Detection + reply generation (concurrent by default)
+    started = time.perf_counter()
+    with STAGE_LATENCY.time(stage="turn"):
+        is_scam, reply_text = await pipeline.run(incoming_msg, history, session_id=session_id, on_late_verdict=on_late_verdict)
+    if admission:
+        admission.observe_turn(time.perf_counter() - started)
+    reply_holder["text"] = reply_text
+
+    if is_scam is None and pipeline.cancel_on_budget:
+        # Verdict abandoned: fail safe like the detector does and treat it as a scam
+        is_scam = True
+
+    agent_msg = MessageItem(sender=SenderType.USER, text=reply_text, timestamp=incoming_msg.timestamp + 1000)
+    await record_turn(session_id, history, in_sync, [incoming_msg, agent_msg])
+
     if is_scam:
         # Normal production flow
-        agent_msg = MessageItem(sender=SenderType.USER, text=reply_text, timestamp=incoming_msg.timestamp + 1000)
-        background_tasks.add_task(process_intelligence, session_id, history_for_agent + [agent_msg], is_scam)
+        await enqueue_intelligence(session_id, history_for_agent + [agent_msg], is_scam)
     
     return AgentResponse(status="success", reply=reply_text)
 
-async def process_intelligence(session_id: str, history: list, is_scam: bool):
-    if not is_scam:
-        return
+async def enqueue_intelligence(session_id: str, history: List[MessageItem], is_scam: bool) -> Optional[int]:
+    """
+    Queues extraction + final report for the session. A job already waiting for
+    the same session is replaced, so only its latest turn is processed. Turns
+    whose newest scammer message carries indicators run first.
+    """
+    if not is_scam or not job_queue:
+        return None
+    latest = next((m for m in reversed(history) if m.sender == SenderType.SCAMMER), None)
+    has_indicators = False
+    if latest:
+        data, _ = engine.extract_text(latest.text)
+        has_indicators = any(data[k] for k in ("upiIds", "phoneNumbers", "bankAccounts", "phishingLinks"))
+    try:
+        return await job_queue.submit(
+            "intelligence",
+            {"sessionId": session_id, "isScam": is_scam, "history": [m.model_dump(mode="json") for m in history]},
+            priority=1 if has_indicators else 0,
+            dedupe_key=f"intel:{session_id}",
+        )
+    except Exception as e:
+        # e.g. "database is locked": the next turn of the session enqueues again
+        logger.error(f"Failed to enqueue intelligence job for {session_id}: {e}")
+        EXCEPTIONS.inc(module="jobs")
+        return None
+
+async def run_intelligence_job(payload: dict):
+    session_id = payload["sessionId"]
+    history = [MessageItem(**m) for m in payload["history"]]
+    try:
+        # Only the scammer messages added since the last checkpoint are analysed
+        with STAGE_LATENCY.time(stage="extract"):
+            data = await intel_tracker.update(session_id, history)
+        if intel_store:
+            intel_store.record(session_id, data)
+
+        with STAGE_LATENCY.time(stage="report"):
+            await send_final_report(session_id, payload["isScam"], len(history), data)
+    except Exception:
+        EXCEPTIONS.inc(module="intelligence")
+        # Re-raised so the job queue retries it
+        raise
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, separators=(',', ':'))}\n\n"
 
+async def finish_streamed_turn(detect_task: asyncio.Task, session_id: str, history: list):
+    # Settle detection after the streamed reply has been delivered
     try:
-        data = extractor.extract(history)
-        message_count = len(history)
-        
-        await send_final_report(session_id, is_scam, message_count, data)
-        
+        is_scam = await detect_task
     except Exception as e:
-        # logger.error(f"Background processing failed: {e}")
-        pass
+        logger.error(f"Stream detection error: {e}")
+        EXCEPTIONS.inc(module="stream")
+        is_scam = True
+    await enqueue_intelligence(session_id, history, is_scam)
+
+@app.post("/stream")
+async def handle_stream(
+    request: IncomingRequest,
+    background_tasks: BackgroundTasks,
+    key: str = Depends(verify_api_key)
+):
+    """
+    Same as POST / but streams the agent reply as Server-Sent Events:
+    `data: {"delta": ...}` per chunk, then `event: done` with the full reply.
+    """
+    if not cascade or not agent:
+        logger.error("Service Unavailable: Core modules not initialized.")
+        raise HTTPException(status_code=503, detail="Service Unavailable: AI modules failed to initialize (Check Server Logs/Env Vars)")
+
+    session_id = request.sessionId
+    incoming_msg = request.message
+    shed_reason = admit(session_id, key)
+    history, in_sync = await resolve_history(request)
+    history_for_agent = history + [incoming_msg]
+
+    if shed_reason:
+        reply_text = await shed_turn(session_id, history, in_sync, incoming_msg)
+        events = [sse_event({"delta": reply_text}), sse_event({"status": "success", "reply": reply_text}, event="done")]
+        return StreamingResponse(iter(events), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+    # Detection runs while the reply streams
+    detect_task = asyncio.create_task(cascade.detect(incoming_msg.text, history, session_id=session_id))
+
+    async def event_stream():
+        parts = []
+        try:
+            async for chunk in agent.stream_reply(history_for_agent, incoming_msg.text, session_id=session_id):
+                parts.append(chunk)
+                yield sse_event({"delta": chunk})
+        except BaseException:
+            # Client went away mid-stream
+            detect_task.cancel()
+            raise
+
+        reply_text = "".join(parts).strip()
+        agent_msg = MessageItem(sender=SenderType.USER, text=reply_text, timestamp=incoming_msg.timestamp + 1000)
+        await record_turn(session_id, history, in_sync, [incoming_msg, agent_msg])
+        background_tasks.add_task(finish_streamed_turn, detect_task, session_id, history_for_agent + [agent_msg])
+        yield sse_event({"status": "success", "reply": reply_text}, event="done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/batch")
+async def handle_batch(request: Request, key: str = Depends(verify_api_key)):
+    """
+    Offline triage: JSONL body of {"id": ..., "text": ...} lines, streamed back as
+    JSONL {"id", "isScam", "tier", "extractedIntelligence"} in input order.
+    Uncertain messages are packed several per LLM prompt; when the LLM cannot
+    score one it comes back with "isScam": null and an "error".
+    """
+    if not cascade or not detector:
+        logger.error("Service Unavailable: Core modules not initialized.")
+        raise HTTPException(status_code=503, detail="Service Unavailable: AI modules failed to initialize (Check Server Logs/Env Vars)")
+
+    scorer = BatchScorer(cascade, detector)
+    # The body is read up front: once a StreamingResponse starts, Starlette's
+    # disconnect listener owns the receive channel. Use the CLI for huge files.
+    body = (await request.body()).decode("utf-8")
+
+    async def result_lines():
+        with STAGE_LATENCY.time(stage="batch"):
+            async for result in scorer.score(iter_rows(aiter_lines(body.splitlines()))):
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        logger.info(f"Batch scored: {json.dumps(scorer.stats())}")
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
+@app.get("/health")
+async def health():
+    """
+    Liveness: the process is up and serving. Does not touch the LLM.
+    """
+    return {"status": "ok", "modulesInitialized": detector is not None and agent is not None}
+
+@app.get("/ready")
+async def ready():
+    """
+    Readiness: modules initialized, tokenizer loaded and the LLM provider
+    reachable (503 otherwise).
+    """
+    if not (detector and agent and llm_client):
+        raise HTTPException(status_code=503, detail="Core modules not initialized")
+    if not readiness["tokenizer"]:
+        raise HTTPException(status_code=503, detail="Tokenizer loading")
+    if not await check_llm():
+        raise HTTPException(status_code=503, detail=f"LLM unreachable: {readiness['error']}")
+    return {"status": "ready", "llmCheckedAt": readiness["checkedAtUnix"]}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(key: str = Depends(verify_api_key)):
+    """
+    Prometheus text exposition of latency, LLM usage, fallback and queue metrics.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats")
+async def get_stats(key: str = Depends(verify_api_key)):
+    """
+    Detection cascade per-tier hit rates and response cache hit/miss counts.
+    """
+    return {
+        "detection": cascade.stats() if cascade else {},
+        "responseCache": await asyncio.to_thread(response_cache.stats) if response_cache else {},
+        "callback": callback.dispatcher.stats() if callback.dispatcher else {},
+        "logging": logging_stats(),
+        "intelStore": intel_store.stats() if intel_store else {},
+        "jobs": job_queue.stats() if job_queue else {},
+        "admission": admission.stats() if admission else {},
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: int, key: str = Depends(verify_api_key)):
+    """
+    Status of one intelligence job: queued | running | retry | done | failed | superseded.
+    """
+    job = await asyncio.to_thread(job_queue.get, job_id) if job_queue else None
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+@app.get("/intel/lookup")
+async def intel_lookup(
+    value: str,
+    kind: Optional[str] = Query(None, description="upi | phone | account | ifsc | url | domain (default: try all)"),
+    key: str = Depends(verify_api_key)
+):
+    """
+    Cross-session correlation: which sessions used this UPI ID / phone / account / link.
+    """
+    if not intel_store:
+        raise HTTPException(status_code=503, detail="Intel store disabled (INTEL_STORE=off)")
+    return {"value": value, "matches": await asyncio.to_thread(intel_store.lookup, value, kind)}
+
+@app.get("/intel/sessions/{session_id}")
+async def intel_session(session_id: str, key: str = Depends(verify_api_key)):
+    """
+    Indicators recorded for one session.
+    """
+    if not intel_store:
+        raise HTTPException(status_code=503, detail="Intel store disabled (INTEL_STORE=off)")
+    return {"sessionId": session_id, "indicators": await asyncio.to_thread(intel_store.session_indicators, session_id)}
+
+@app.post("/sessions/{session_id}/finalize")
+async def finalize_session(session_id: str, key: str = Depends(verify_api_key)):
+    """
+    Re-runs a full extraction over the session transcript and sends the final report.
+    The shared session store is preferred over this worker's copy of the history,
+    which is missing after a restart or when another worker ran the session's jobs.
+    """
+    if not intel_tracker:
+        raise HTTPException(status_code=503, detail="Service Unavailable: AI modules failed to initialize (Check Server Logs/Env Vars)")
+    history = await asyncio.to_thread(session_store.get, session_id) if session_store else None
+    if not history:
+        state = intel_tracker.get(session_id)
+        history = state.history if state else None
+    if not history:
+        raise HTTPException(status_code=404, detail="Unknown session")
+
+    is_scam = await session_verdict(session_id, history)
+    data = await intel_tracker.finalize(session_id, history)
+    if intel_store:
+        intel_store.record(session_id, data)
+    sent = await send_final_report(session_id, is_scam, len(history), data)
+    return {"status": "success", "sessionId": session_id, "scamDetected": is_scam, "reportSent": sent, "extractedIntelligence": data}
+
+async def session_verdict(session_id: str, history: List[MessageItem]) -> bool:
+    """
+    The verdict the session was handled with: flagged if this worker's cascade
+    remembers it or any worker queued intelligence for it (only scams are queued),
+    otherwise re-detected from the latest scammer message.
+    """
+    if cascade and cascade.verdicts.get(session_id):
+        return True
+    if job_queue and await asyncio.to_thread(job_queue.has_key, f"intel:{session_id}"):
+        return True
+    for i in range(len(history) - 1, -1, -1):
+        if history[i].sender == SenderType.SCAMMER:
+            return await cascade.detect(history[i].text, history[:i], session_id=session_id)
+    return False
 
 @app.post("/", response_model=AgentResponse)
 async def handle_post(
     request: IncomingRequest, 
-    background_tasks: BackgroundTasks, 
     key: str = Depends(verify_api_key),
     x_test_mode: bool = Header(False)
 ):
     """
     Handle POST request with JSON payload.
     """
-    return await process_request_logic(request, background_tasks, is_test_mode=x_test_mode)
+    return await process_request_logic(request, api_key=key, is_test_mode=x_test_mode)
 
 @app.get("/", response_model=AgentResponse)
 async def handle_get(
     request: IncomingRequest,
-    background_tasks: BackgroundTasks,
     key: str = Depends(verify_api_key),
     test_mode: bool = Query(False, description="Enable test mode to return extracted intelligence")
 ):
     """
     Handle GET request with JSON payload (forced).
     """
-    return await process_request_logic(request, background_tasks, is_test_mode=test_mode)
+    return await process_request_logic(request, api_key=key, is_test_mode=test_mode)
 
 if __name__ == "__main__":
     import uvicorn
@@ -19,7 +19,8 @@ class RequestMetadata(BaseModel):
 class IncomingRequest(BaseModel):
     sessionId: str
     message: MessageItem
-    conversationHistory: List[MessageItem] = []
+    # Omit to let the server rebuild the history from its session store
+    conversationHistory: Optional[List[MessageItem]] = None
     metadata: Optional[RequestMetadata] = None
 
 class AgentResponse(BaseModel):
@@ -0,0 +1,53 @@
+import os
+import argparse
+import uvicorn
+from dotenv import load_dotenv
+
+def use_shared_state(state_dir: str):
+    """
+    Workers are separate processes, so in-memory session history and response
+    caches would diverge between them. Point every store at SQLite files in
+    `state_dir` unless the environment already chose a backend.
+    Still per worker: the cascade's sticky scam verdicts and the incremental
+    extraction checkpoints, so a session that moves between workers has its
+    scammer messages extracted again.
+    Rate limits (RATE_LIMIT_*) and LLM_MAX_INFLIGHT are also enforced per worker;
+    they are configured as deployment totals and each worker gets 1/WORKER_COUNT
+    of them, so a single hot key or session is held to roughly the configured rate.
+    """
+    os.makedirs(state_dir, exist_ok=True)
+    defaults = {
+        "SESSION_STORE": "sqlite",
+        "SESSION_STORE_PATH": os.path.join(state_dir, "sessions.db"),
+        "RESPONSE_CACHE_BACKEND": "sqlite",
+        "RESPONSE_CACHE_PATH": os.path.join(state_dir, "response_cache.db"),
+        "INTEL_STORE_PATH": os.path.join(state_dir, "intel.db"),
+        "JOB_QUEUE_PATH": os.path.join(state_dir, "jobs.db"),
+        "LOG_PER_WORKER": "1",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run the honeypot API with N worker processes")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    # cpu_count() reports the host's CPUs, not a container's quota: scale out explicitly
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")))
+    parser.add_argument("--state-dir", default=os.getenv("STATE_DIR", "."), help="directory for shared SQLite state")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", "30")))
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        use_shared_state(args.state_dir)
+    # Read by the workers to split deployment-wide limits between them
+    os.environ["WORKER_COUNT"] = str(args.workers)
+
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
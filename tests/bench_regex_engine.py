@@ -0,0 +1,38 @@
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.regex_engine import engine
+
+def load_messages():
+    data_file = "tests/test_data_scenarios.json"
+    with open(data_file, "r") as f:
+        scenarios = json.load(f)
+
+    texts = []
+    for scenario in scenarios:
+        body = scenario.get("requestBody", {})
+        texts.append(body["message"]["text"])
+        texts.extend(m["text"] for m in body.get("conversationHistory", []))
+    return texts
+
+def run_benchmark(total: int = 200_000):
+    texts = load_messages()
+    batch = (texts * (total // len(texts) + 1))[:total]
+
+    print(f"Benchmarking regex engine over {len(batch)} messages ({len(texts)} unique)")
+
+    start = time.perf_counter()
+    results = engine.extract_batch(batch)
+    elapsed = time.perf_counter() - start
+
+    ambiguous = sum(1 for _, amb in results if amb)
+    print(f"Elapsed: {elapsed:.3f}s")
+    print(f"Throughput: {len(batch) / elapsed:,.0f} messages/sec")
+    print(f"Ambiguous (would escalate to LLM): {ambiguous}/{len(batch)}")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,86 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+def bench_env(tmp_dir: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault("GROQ_API_KEY", "bench-placeholder")
+    # Keep benchmark state and logs out of the repo
+    for key, name in [("CONVERSATION_LOG", "conversation.log"), ("INTEL_LOG", "intel.log"),
+                      ("CALLBACK_DEAD_LETTER", "dead_letter.jsonl"), ("JOB_QUEUE_PATH", "jobs.db"),
+                      ("INTEL_STORE_PATH", "intel.db")]:
+        env.setdefault(key, os.path.join(tmp_dir, name))
+    return env
+
+def measure_import(runs: int, env: dict):
+    wall, inner = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        wall.append(time.perf_counter() - start)
+        inner.append(float(out.stdout.strip().splitlines()[-1]))
+    return wall, inner
+
+def wait_for(url: str, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.01)
+    return float("nan")
+
+def measure_boot(runs: int, port: int, timeout: float, env: dict):
+    health, ready = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = start + timeout
+            health.append(wait_for(f"http://127.0.0.1:{port}/health", deadline) - start)
+            ready.append(wait_for(f"http://127.0.0.1:{port}/ready", deadline) - start)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+    return health, ready
+
+def report(name: str, samples):
+    samples = [s for s in samples if s == s]
+    if not samples:
+        print(f"{name:<28} no successful runs")
+        return
+    print(f"{name:<28} median {statistics.median(samples) * 1000:8.1f} ms   min {min(samples) * 1000:8.1f} ms   runs {len(samples)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold import and boot-to-ready time of the API")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for /health and /ready")
+    parser.add_argument("--import-only", action="store_true", help="skip the uvicorn boot measurement")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = bench_env(tmp_dir)
+        wall, inner = measure_import(args.runs, env)
+        report("import main (in-process)", inner)
+        report("python + import main", wall)
+        if not args.import_only:
+            if "GROQ_BASE_URL" not in env:
+                print("GROQ_BASE_URL unset: /ready needs a reachable LLM (e.g. tests/fake_llm_server.py)")
+            health, ready = measure_boot(args.runs, args.port, args.timeout, env)
+            report("spawn -> /health 200", health)
+            report("spawn -> /ready 200", ready)
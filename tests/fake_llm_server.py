@@ -0,0 +1,118 @@
+import argparse
+import asyncio
+import json
+import re
+import os
+import random
+import time
+from collections import Counter
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Local OpenAI/Groq-compatible chat completion server for benchmarks.
+# Point the API at it with GROQ_BASE_URL=http://127.0.0.1:<port>
+
+LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "300"))
+JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", "100"))
+ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+
+app = FastAPI(title="Fake LLM Server")
+calls = Counter()
+errors = Counter()
+
+REPLIES = [
+    "beta what is upi i dont know",
+    "which link beta i am not able to click",
+    "my grandson is not home wait",
+    "otp is what beta where it will come",
+]
+
+def classify(body: dict) -> str:
+    system = body["messages"][0]["content"] if body.get("messages") else ""
+    if "scam detection" in system:
+        return "detect"
+    if "intelligence extraction" in system:
+        return "extract"
+    return "reply"
+
+def fake_content(kind: str, body: dict) -> str:
+    if kind == "detect" and '"results"' in body["messages"][-1]["content"]:
+        # Packed batch prompt: one verdict per numbered message
+        count = len(re.findall(r"^\s*\d+\. ", body["messages"][-1]["content"], re.M))
+        return json.dumps({"results": [{"id": i, "is_scam": True} for i in range(1, count + 1)]})
+    if kind == "detect":
+        return json.dumps({"is_scam": True, "confidence": 0.9, "reason": "urgency and payment request"})
+    if kind == "extract":
+        return json.dumps({
+            "bankAccounts": [], "upiIds": [], "phishingLinks": [], "phoneNumbers": [],
+            "suspiciousKeywords": ["urgent"], "agentNotes": "Scammer used urgency tactics and payment redirection",
+        })
+    return random.choice(REPLIES)
+
+async def simulate_latency():
+    delay = max(0.0, random.gauss(LATENCY_MS, JITTER_MS)) / 1000.0
+    await asyncio.sleep(delay)
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    kind = classify(body)
+    calls[kind] += 1
+
+    await simulate_latency()
+    if random.random() < ERROR_RATE:
+        errors[kind] += 1
+        return JSONResponse(status_code=503, content={"error": {"message": "fake upstream error", "type": "server_error"}})
+
+    content = fake_content(kind, body)
+    usage = {"prompt_tokens": sum(len(m["content"]) // 4 for m in body["messages"]), "completion_tokens": len(content) // 4}
+    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+    if body.get("stream"):
+        async def event_stream():
+            words = content.split(" ")
+            for i, word in enumerate(words):
+                delta = word if i == len(words) - 1 else word + " "
+                chunk = {"id": "fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": body["model"],
+                         "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(0.02)
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    return {
+        "id": "fake",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body["model"],
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage,
+    }
+
+@app.get("/openai/v1/models")
+async def models():
+    return {"object": "list", "data": [{"id": "moonshotai/kimi-k2-instruct", "object": "model"}]}
+
+@app.get("/stats")
+async def stats():
+    return {"calls": dict(calls), "errors": dict(errors), "total": sum(calls.values())}
+
+@app.post("/stats/reset")
+async def reset_stats():
+    calls.clear()
+    errors.clear()
+    return {"status": "success"}
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake OpenAI/Groq-compatible LLM server")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS)
+    parser.add_argument("--jitter-ms", type=float, default=JITTER_MS)
+    parser.add_argument("--error-rate", type=float, default=ERROR_RATE)
+    args = parser.parse_args()
+
+    LATENCY_MS, JITTER_MS, ERROR_RATE = args.latency_ms, args.jitter_ms, args.error_rate
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
@@ -0,0 +1,175 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+# Async load generator for the honeypot API.
+#
+#   python tests/fake_llm_server.py --port 9100 &
+#   GROQ_API_KEY=fake GROQ_BASE_URL=http://127.0.0.1:9100 uvicorn main:app --port 8000 &
+#   python tests/load_test.py --rps 50 --duration 30 --fake-llm http://127.0.0.1:9100
+
+SCAM_OPENERS = [
+    "Your bank account will be blocked today. Verify immediately.",
+    "Dear customer your KYC is expired, update now to avoid suspension",
+    "Congratulations you won Rs 25,00,000 lottery. Pay processing fee to claim",
+    "Your electricity connection will be cut tonight. Call {phone} immediately",
+]
+SCAM_FOLLOWUPS = [
+    "Share your UPI ID to avoid account suspension.",
+    "Send Rs. 10 to {upi} to unblock instantly.",
+    "Click this link to verify: http://{domain}/kyc",
+    "Why not responding? Share the OTP now.",
+    "Transfer to account {account} IFSC SBIN0001234 urgently",
+    "Call our support at {phone} now",
+]
+
+def synthetic_session(index: int, turns: int) -> list:
+    fill = {
+        "phone": f"+91 9{random.randint(100000000, 999999999)}",
+        "upi": f"verify{index}@ybl",
+        "domain": f"secure-kyc{index}.xyz",
+        "account": str(random.randint(10**11, 10**12 - 1)),
+    }
+    texts = [random.choice(SCAM_OPENERS)] + [random.choice(SCAM_FOLLOWUPS) for _ in range(turns - 1)]
+    return [t.format(**fill) for t in texts]
+
+def scenario_sessions(path: str = "tests/test_data_scenarios.json") -> list:
+    with open(path, "r") as f:
+        scenarios = json.load(f)
+    return [[s["requestBody"]["message"]["text"]] for s in scenarios]
+
+class RateLimiter:
+    """Spaces request starts evenly at the target rate (open-loop pacing)."""
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps
+        self.next_at = time.perf_counter()
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = time.perf_counter()
+            if self.next_at > now:
+                await asyncio.sleep(self.next_at - now)
+            self.next_at = max(self.next_at + self.interval, time.perf_counter() - self.interval)
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[k]
+
+async def run_session(client, limiter, args, session_id: str, texts: list, results, deadline: float):
+    history = []
+    for turn, text in enumerate(texts):
+        if time.perf_counter() > deadline:
+            return
+        await limiter.wait()
+        message = {"sender": "scammer", "text": text, "timestamp": int(time.time() * 1000)}
+        payload = {"sessionId": session_id, "message": message, "metadata": {"channel": "SMS", "language": "English", "locale": "IN"}}
+        if not args.server_history:
+            payload["conversationHistory"] = history
+
+        reply = ""
+        start = time.perf_counter()
+        try:
+            if args.endpoint == "/stream":
+                ttfb = None
+                async with client.stream("POST", args.endpoint, json=payload) as response:
+                    async for line in response.aiter_lines():
+                        if ttfb is None and line.startswith("data:"):
+                            ttfb = time.perf_counter() - start
+                        if line.startswith("data:") and '"reply"' in line:
+                            reply = json.loads(line[5:])["reply"]
+                    status = response.status_code
+                results["ttfb"].append(ttfb or 0.0)
+            else:
+                response = await client.post(args.endpoint, json=payload)
+                status = response.status_code
+                reply = response.json().get("reply", "") if status == 200 else ""
+        except Exception as e:
+            results["errors"].append(type(e).__name__)
+            continue
+
+        results["latency"].append(time.perf_counter() - start)
+        if status != 200:
+            results["errors"].append(str(status))
+            continue
+        history = history + [message, {"sender": "user", "text": reply, "timestamp": message["timestamp"] + 1000}]
+
+async def fetch_llm_calls(url: str):
+    if not url:
+        return None
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{url}/stats")).json()
+
+async def main(args) -> int:
+    sessions = scenario_sessions() if args.include_scenarios else []
+    sessions += [synthetic_session(i, args.turns) for i in range(args.sessions)]
+    random.shuffle(sessions)
+
+    headers = {"x-api-key": os.getenv("API_KEY", "")}
+    limiter = RateLimiter(args.rps)
+    results = defaultdict(list)
+    llm_before = await fetch_llm_calls(args.fake_llm)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, timeout=60.0, limits=limits) as client:
+        deadline = time.perf_counter() + args.duration
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def bounded(i, texts):
+            async with semaphore:
+                await run_session(client, limiter, args, f"load-{int(time.time())}-{i}", texts, results, deadline)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(bounded(i, texts) for i, texts in enumerate(sessions)))
+        elapsed = time.perf_counter() - started
+
+    # Give background intelligence tasks a moment before reading LLM counters
+    await asyncio.sleep(args.settle)
+    llm_after = await fetch_llm_calls(args.fake_llm)
+
+    latency_ms = [v * 1000 for v in results["latency"]]
+    done = len(latency_ms)
+    print(f"Endpoint: {args.endpoint}   target RPS: {args.rps}   sessions: {len(sessions)}")
+    print(f"Requests: {done} ok, {len(results['errors'])} errors in {elapsed:.1f}s -> {done / elapsed:.1f} req/s")
+    print(f"Latency ms: p50={percentile(latency_ms, 50):.0f} p95={percentile(latency_ms, 95):.0f} p99={percentile(latency_ms, 99):.0f} max={max(latency_ms, default=0):.0f}")
+    if results["ttfb"]:
+        ttfb_ms = [v * 1000 for v in results["ttfb"]]
+        print(f"First token ms: p50={percentile(ttfb_ms, 50):.0f} p95={percentile(ttfb_ms, 95):.0f}")
+    if llm_before is not None and llm_after is not None:
+        by_kind = {k: v - llm_before["calls"].get(k, 0) for k, v in llm_after["calls"].items()}
+        total = sum(by_kind.values())
+        print(f"LLM calls: {total} ({total / max(done, 1):.2f}/request) {by_kind}")
+    if results["errors"]:
+        print(f"Errors: {dict((e, results['errors'].count(e)) for e in set(results['errors']))}")
+
+    if args.max_p95_ms and percentile(latency_ms, 95) > args.max_p95_ms:
+        print(f"FAILED: p95 above {args.max_p95_ms}ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the honeypot API")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--endpoint", default="/", choices=["/", "/stream"])
+    parser.add_argument("--rps", type=float, default=20)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--no-scenarios", dest="include_scenarios", action="store_false", help="Only replay synthetic sessions")
+    parser.add_argument("--server-history", action="store_true", help="Omit conversationHistory and rely on the server session store")
+    parser.add_argument("--fake-llm", default="", help="Fake LLM server URL to read call counts from")
+    parser.add_argument("--settle", type=float, default=1.0)
+    parser.add_argument("--max-p95-ms", type=float, default=0, help="Exit non-zero if p95 exceeds this")
+    sys.exit(asyncio.run(main(parser.parse_args())))
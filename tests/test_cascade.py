@@ -0,0 +1,91 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.cascade import DetectionCascade, LocalModelTier
+from utils.intel_store import IntelStore
+
+class FakeDetector:
+    """ScamDetector stand-in: classify() returns a fixed verdict (None = LLM failure)."""
+
+    def __init__(self, verdict):
+        self.verdict = verdict
+        self.calls = 0
+
+    async def classify(self, message, history):
+        self.calls += 1
+        return self.verdict
+
+class FakeModel(LocalModelTier):
+    def __init__(self, proba):
+        self.model = None
+        self.proba = proba
+
+    def predict(self, text):
+        return self.proba
+
+def make_cascade(verdict=False, proba=None, intel_store=None) -> DetectionCascade:
+    return DetectionCascade(FakeDetector(verdict), local_model=FakeModel(proba), intel_store=intel_store)
+
+def test_lexical_tier_skips_llm():
+    cascade = make_cascade()
+    assert asyncio.run(cascade.detect("Your account blocked, share OTP to unblock", [], session_id="s1"))
+    assert cascade.hits["lexical"] == 1
+    assert cascade.detector.calls == 0
+
+def test_session_verdict_is_sticky():
+    cascade = make_cascade()
+    asyncio.run(cascade.detect("Your account blocked, share OTP to unblock", [], session_id="s1"))
+    assert asyncio.run(cascade.detect("hello", [], session_id="s1"))
+    assert cascade.hits["session"] == 1
+    assert cascade.detector.calls == 0
+
+def test_benign_llm_verdict_is_not_sticky():
+    cascade = make_cascade(verdict=False)
+    assert not asyncio.run(cascade.detect("hello", [], session_id="s1"))
+    assert not asyncio.run(cascade.detect("how are you", [], session_id="s1"))
+    assert cascade.hits["llm"] == 2
+    assert cascade.hits["session"] == 0
+
+def test_model_tier_decides_confident_messages():
+    cascade = make_cascade(proba=0.99)
+    assert asyncio.run(cascade.detect("hello", []))
+    cascade = make_cascade(verdict=True, proba=0.01)
+    assert not asyncio.run(cascade.detect("hello", []))
+    assert cascade.hits["model"] == 1
+    # Uncertain probabilities go to the LLM
+    cascade = make_cascade(verdict=True, proba=0.5)
+    assert asyncio.run(cascade.detect("hello", []))
+    assert cascade.hits["llm"] == 1
+
+def test_llm_failure_is_not_remembered():
+    cascade = make_cascade(verdict=None)
+    assert asyncio.run(cascade.detect("hello", [], session_id="s1"))
+    assert cascade.hits["fallback"] == 1
+    assert cascade.verdicts.get("s1") is None
+
+def test_intel_tier_matches_other_sessions_only():
+    store = IntelStore(os.path.join(tempfile.mkdtemp(), "intel.db"), flush_interval=0.01, refresh_interval=0)
+    try:
+        store.record("s1", {"upiIds": ["scammer.pay@ybl"]})
+        cascade = make_cascade(verdict=False, intel_store=store)
+        assert asyncio.run(cascade.detect("send to scammer.pay@ybl", [], session_id="s2"))
+        assert cascade.hits["intel"] == 1
+        assert cascade.detect_local("send to scammer.pay@ybl", session_id="s1") is None
+    finally:
+        store.close()
+
+def test_detect_cheap_never_calls_llm():
+    cascade = make_cascade(verdict=True)
+    assert cascade.detect_cheap("hello", "s1") is None
+    assert cascade.detect_cheap("Your account blocked, share OTP to unblock", "s1")
+    assert cascade.detector.calls == 0
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"ok  {name}")
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.intel_store import IntelStore, normalize_indicator
+
+def make_store(path=None) -> IntelStore:
+    return IntelStore(path or os.path.join(tempfile.mkdtemp(), "intel.db"), flush_interval=0.01, refresh_interval=0)
+
+def test_normalize_indicator():
+    assert normalize_indicator("upi", " Scammer.Pay@YBL ") == ("upi", "scammer.pay@ybl")
+    assert normalize_indicator("phone", "98765 43210") == ("phone", "+919876543210")
+    assert normalize_indicator("account", "sbin0001234") == ("ifsc", "SBIN0001234")
+    assert normalize_indicator("url", "https://Bit.ly/AbCd12/") == ("url", "bit.ly/AbCd12")
+    assert normalize_indicator("url", "bit.ly/AbCd12") == ("url", "bit.ly/AbCd12")
+    assert normalize_indicator("url", "http://Bad.example.com/") == ("domain", "bad.example.com")
+
+def test_known_bad_ignores_own_session():
+    store = make_store()
+    try:
+        store.record("s1", {"upiIds": ["scammer.pay@ybl"]})
+        intel = {"upiIds": ["Scammer.Pay@ybl"]}
+        assert store.known_bad(intel, "s1") == []
+        assert store.known_bad(intel, "s2") == [("upi", "scammer.pay@ybl")]
+        # Once reused by another session it is known-bad for both
+        store.record("s2", intel)
+        assert store.known_bad(intel, "s1") == [("upi", "scammer.pay@ybl")]
+    finally:
+        store.close()
+
+def test_known_bad_require_all():
+    store = make_store()
+    try:
+        store.record("s1", {"upiIds": ["scammer.pay@ybl"]})
+        intel = {"upiIds": ["scammer.pay@ybl"], "phoneNumbers": ["+919876543210"]}
+        assert store.known_bad(intel, "s2") == [("upi", "scammer.pay@ybl")]
+        assert store.known_bad(intel, "s2", require_all=True) == []
+        assert store.known_bad({"upiIds": ["scammer.pay@ybl"]}, "s2", require_all=True) == [("upi", "scammer.pay@ybl")]
+    finally:
+        store.close()
+
+def test_sightings_survive_reopen():
+    path = os.path.join(tempfile.mkdtemp(), "intel.db")
+    store = make_store(path)
+    store.record("s1", {"phoneNumbers": ["+919876543210"], "phishingLinks": ["bit.ly/AbCd12"]})
+    store.close()
+
+    store = make_store(path)
+    try:
+        assert store.known_bad({"phoneNumbers": ["9876543210"]}, "s2") == [("phone", "+919876543210")]
+        matches = store.lookup("98765 43210")
+        assert [(m["kind"], [s["sessionId"] for s in m["sessions"]]) for m in matches] == [("phone", ["s1"])]
+        assert store.session_indicators("s1") == [
+            {"kind": "domain", "value": "bit.ly"},
+            {"kind": "phone", "value": "+919876543210"},
+            {"kind": "url", "value": "bit.ly/AbCd12"},
+        ]
+    finally:
+        store.close()
+
+def test_refresh_picks_up_other_processes():
+    path = os.path.join(tempfile.mkdtemp(), "intel.db")
+    reader = make_store(path)
+    writer = make_store(path)
+    try:
+        # Committed by another process: only the refresh can see it
+        writer._write([("s1", {("upi", "scammer.pay@ybl")}, time.time())])
+        assert reader.known_bad({"upiIds": ["scammer.pay@ybl"]}, "s2") == []
+        reader._refresh()
+        assert reader.known_bad({"upiIds": ["scammer.pay@ybl"]}, "s2") == [("upi", "scammer.pay@ybl")]
+    finally:
+        writer.close()
+        reader.close()
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"ok  {name}")
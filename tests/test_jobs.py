@@ -0,0 +1,93 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.jobs import JobQueue
+
+def make_queue(**kwargs) -> JobQueue:
+    return JobQueue(os.path.join(tempfile.mkdtemp(), "jobs.db"), **kwargs)
+
+def status(queue: JobQueue, job_id: int) -> str:
+    return queue.get(job_id)["status"]
+
+def test_dedupe_replaces_queued_payload():
+    queue = make_queue()
+    first = queue.enqueue("intelligence", {"turn": 1}, dedupe_key="intel:s1")
+    second = queue.enqueue("intelligence", {"turn": 2}, priority=1, dedupe_key="intel:s1")
+    assert first == second
+    job_id, _, payload, attempts = queue._claim()
+    assert job_id == first and payload == '{"turn":2}' and attempts == 1
+    assert queue._claim() is None
+    assert queue.has_key("intel:s1") and not queue.has_key("intel:s2")
+
+def test_claim_orders_by_priority():
+    queue = make_queue()
+    low = queue.enqueue("intelligence", {}, priority=0)
+    high = queue.enqueue("intelligence", {}, priority=1)
+    assert queue._claim()[0] == high
+    assert queue._claim()[0] == low
+    assert status(queue, high) == "running"
+
+def test_retry_then_fail():
+    queue = make_queue(max_attempts=2, base_delay=0)
+    job_id = queue.enqueue("intelligence", {})
+    _, _, _, attempts = queue._claim()
+    queue._finish(job_id, "boom", attempts)
+    assert status(queue, job_id) == "retry"
+    _, _, _, attempts = queue._claim()
+    assert attempts == 2
+    queue._finish(job_id, "boom", attempts)
+    job = queue.get(job_id)
+    assert job["status"] == "failed" and job["error"] == "boom"
+    assert queue._claim() is None
+
+def test_new_payload_supersedes_pending_retry():
+    queue = make_queue(base_delay=60)
+    job_id = queue.enqueue("intelligence", {"turn": 1}, dedupe_key="intel:s1")
+    _, _, _, attempts = queue._claim()
+    queue._finish(job_id, "boom", attempts)
+    newer = queue.enqueue("intelligence", {"turn": 2}, dedupe_key="intel:s1")
+    assert newer != job_id
+    assert status(queue, job_id) == "superseded"
+    assert queue._claim()[0] == newer
+
+def test_expired_lease_is_reclaimed():
+    queue = make_queue(lease=0)
+    job_id = queue.enqueue("intelligence", {})
+    assert queue._claim()[0] == job_id
+    reclaimed = queue._claim()
+    assert reclaimed[0] == job_id and reclaimed[3] == 2
+
+def test_worker_runs_and_retries_jobs():
+    async def run():
+        queue = make_queue(workers=1, base_delay=0, poll_interval=0.01, stats_interval=0.01)
+        calls = []
+
+        async def handler(payload):
+            calls.append(payload["n"])
+            if len(calls) == 1:
+                raise RuntimeError("transient")
+
+        queue.register("intelligence", handler)
+        await queue.start()
+        job_id = await queue.submit("intelligence", {"n": 1})
+        for _ in range(200):
+            if status(queue, job_id) == "done":
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        await queue.stop()
+        assert calls == [1, 1]
+        assert queue.get(job_id)["attempts"] == 2
+        assert queue.stats()["byStatus"] == {"done": 1}
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"ok  {name}")
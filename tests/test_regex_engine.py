@@ -0,0 +1,64 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.regex_engine import engine, normalize_account, normalize_phone, normalize_url
+from models.api import MessageItem, SenderType
+
+def test_normalize_phone():
+    assert normalize_phone("+91 98765 43210") == "+919876543210"
+    assert normalize_phone("098765-43210") == "+919876543210"
+    assert normalize_phone("9876543210") == "+919876543210"
+    # Not an Indian mobile number
+    assert normalize_phone("1234567890") is None
+    assert normalize_phone("12345") is None
+
+def test_normalize_account():
+    assert normalize_account("1234 5678 9012") == "123456789012"
+    assert normalize_account("+1234567890") is None
+    assert normalize_account("12345678") is None
+
+def test_normalize_url_strips_trailing_punctuation():
+    assert normalize_url("https://bit.ly/AbC).") == "https://bit.ly/AbC"
+    assert normalize_url("http://localhost") is None
+
+def test_extract_text_indicators():
+    data, ambiguous = engine.extract_text(
+        "Pay to scammer.pay@ybl, call +91 98765 43210 or visit http://bad.example.com/login. "
+        "Account 123456789012 IFSC SBIN0001234"
+    )
+    assert not ambiguous
+    assert data["upiIds"] == ["scammer.pay@ybl"]
+    assert data["phoneNumbers"] == ["+919876543210"]
+    assert data["phishingLinks"] == ["http://bad.example.com/login"]
+    assert data["bankAccounts"] == ["SBIN0001234", "123456789012"]
+
+def test_email_is_not_a_upi_id():
+    data, _ = engine.extract_text("email me at john@gmail.com")
+    assert data["upiIds"] == []
+
+def test_obfuscated_identifier_is_ambiguous():
+    _, ambiguous = engine.extract_text("send it to rahul [at] ybl")
+    assert ambiguous
+
+def test_keywords_are_lowercased_and_deduplicated():
+    data, _ = engine.extract_text("URGENT: your account blocked, share OTP. Urgent!")
+    assert data["suspiciousKeywords"] == ["urgent", "account blocked", "share otp"]
+
+def test_extract_messages_reads_scammer_messages_only():
+    history = [
+        MessageItem(sender=SenderType.SCAMMER, text="Pay to scammer.pay@ybl", timestamp=1),
+        MessageItem(sender=SenderType.USER, text="my number is 9876543210", timestamp=2),
+        MessageItem(sender=SenderType.SCAMMER, text="again: scammer.pay@ybl", timestamp=3),
+    ]
+    data, ambiguous = engine.extract_messages(history)
+    assert data["upiIds"] == ["scammer.pay@ybl"]
+    assert data["phoneNumbers"] == []
+    assert not ambiguous
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"ok  {name}")
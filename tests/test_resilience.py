@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.llm import LLMClient
+from core.resilience import CircuitBreaker, hedged
+
+class HangingCompletions:
+    """Fake chat.completions whose calls never return until cancelled."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(3600)
+
+def make_client() -> LLMClient:
+    client = LLMClient(api_key="test", timeout=60)
+    client.hedge_enabled = False
+    completions = HangingCompletions()
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client
+
+def half_open(client: LLMClient, model: str) -> CircuitBreaker:
+    breaker = client.breaker(model)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker.opened_at -= breaker.reset_timeout
+    assert breaker.state == "half-open"
+    return breaker
+
+async def cancel_trial(client: LLMClient, model: str):
+    task = asyncio.create_task(client.chat([{"role": "user", "content": "hi"}], model=model))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+def test_cancelled_chat_trial_frees_breaker():
+    async def run():
+        client = make_client()
+        breaker = half_open(client, "m")
+        await cancel_trial(client, "m")
+        assert client.client.chat.completions.calls == 1
+        assert not breaker.trial_in_flight
+        assert breaker.allow(), "breaker stuck after a cancelled half-open trial"
+
+    asyncio.run(run())
+
+def test_closed_stream_trial_frees_breaker():
+    async def run():
+        client = make_client()
+        breaker = half_open(client, "m")
+
+        async def consume():
+            async for _ in client.stream([{"role": "user", "content": "hi"}], model="m"):
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert breaker.allow(), "breaker stuck after a cancelled streaming trial"
+
+    asyncio.run(run())
+
+def test_trial_failure_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.opened_at is not None
+
+def test_cancelled_hedged_call_cancels_attempts():
+    async def run():
+        started, cancelled = [], []
+
+        async def call():
+            started.append(1)
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.append(1)
+                raise
+
+        for hedge_after in (1.0, 0.01):
+            started.clear()
+            cancelled.clear()
+            task = asyncio.create_task(hedged(call, hedge_after))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            await asyncio.sleep(0)
+            assert len(cancelled) == len(started), f"orphaned attempts with hedge_after={hedge_after}"
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    for name, fn in list(globals().items()):
+        if name.startswith("test_") and callable(fn):
+            fn()
+            print(f"ok  {name}")
@@ -0,0 +1,194 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+from utils.cache import LRUCache
+
+def worker_share(total: float) -> float:
+    """
+    This process's share of a limit configured for the whole deployment.
+    serve.py exports WORKER_COUNT; each worker keeps its own buckets and
+    semaphore, so without the split N workers would admit N times the limit.
+    """
+    return total / max(1, int(os.getenv("WORKER_COUNT", "1")))
+
+class TokenBucket:
+    """
+    `rate` tokens per second up to `burst`. take() returns 0 when admitted,
+    otherwise the seconds until a token is available.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    """
+    One token bucket per key (API key, sessionId, ...), LRU-bounded.
+    rate <= 0 disables the limit.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.buckets = LRUCache(maxsize=max_keys)
+        self._lock = threading.Lock()
+
+    def check(self, key: str) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self.buckets.set(key, bucket)
+            return bucket.take()
+
+class ConcurrencyLimiter:
+    """
+    Global cap on in-flight LLM calls (async context manager). limit <= 0 disables it.
+    `waiting` is the number of calls queued for a slot.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.semaphore = asyncio.Semaphore(limit) if limit > 0 else None
+        self.inflight = 0
+        self.waiting = 0
+
+    async def acquire(self, timeout: Optional[float] = None):
+        """
+        Waits for a slot; raises asyncio.TimeoutError after `timeout` seconds.
+        """
+        if self.semaphore is not None:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.semaphore.acquire(), timeout)
+            finally:
+                self.waiting -= 1
+        self.inflight += 1
+
+    def release(self):
+        self.inflight -= 1
+        if self.semaphore is not None:
+            self.semaphore.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+class LoadShedder:
+    """
+    Decides when to answer with a cheap persona fallback instead of queuing for
+    the LLM: when the p95 of turns completed in the last `window` seconds breaks
+    the SLO, or when more than `max_queue` LLM calls are already waiting for a slot.
+    Samples age out, so shedding stops by itself once the backlog clears.
+    """
+
+    def __init__(self, slo_ms: float, window: float = 10.0, min_samples: int = 20, max_queue: int = 0):
+        self.slo = slo_ms / 1000.0
+        self.window = window
+        self.min_samples = min_samples
+        self.max_queue = max_queue
+        self.samples = deque(maxlen=2000)
+
+    def observe(self, seconds: float):
+        self.samples.append((time.monotonic(), seconds))
+
+    def p95(self) -> Optional[float]:
+        cutoff = time.monotonic() - self.window
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        if len(self.samples) < self.min_samples:
+            return None
+        ordered = sorted(s for _, s in self.samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def reason(self, llm_waiting: int = 0) -> Optional[str]:
+        """
+        Why the next turn should be shed, or None to admit it.
+        """
+        if self.max_queue > 0 and llm_waiting > self.max_queue:
+            return "llm_queue"
+        if self.slo > 0:
+            p95 = self.p95()
+            if p95 is not None and p95 > self.slo:
+                return "slo"
+        return None
+
+class AdmissionController:
+    """
+    Per-API-key and per-session token buckets plus SLO-based load shedding.
+    Env: RATE_LIMIT_KEY_RPS / _KEY_BURST, RATE_LIMIT_SESSION_RPS / _SESSION_BURST,
+    SHED_SLO_MS, SHED_WINDOW_SECONDS, SHED_MAX_LLM_QUEUE.
+    Rates and bursts are totals for the deployment and are split evenly across
+    worker processes (worker_share), as requests are not routed by key or session.
+    """
+
+    def __init__(self, key_limiter: RateLimiter, session_limiter: RateLimiter, shedder: LoadShedder):
+        self.key_limiter = key_limiter
+        self.session_limiter = session_limiter
+        self.shedder = shedder
+        self.rejected = {"key": 0, "session": 0}
+        self.shed = {"slo": 0, "llm_queue": 0}
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        return cls(
+            RateLimiter(
+                worker_share(float(os.getenv("RATE_LIMIT_KEY_RPS", "50"))),
+                worker_share(float(os.getenv("RATE_LIMIT_KEY_BURST", "100"))),
+            ),
+            RateLimiter(
+                worker_share(float(os.getenv("RATE_LIMIT_SESSION_RPS", "2"))),
+                worker_share(float(os.getenv("RATE_LIMIT_SESSION_BURST", "10"))),
+            ),
+            LoadShedder(
+                slo_ms=float(os.getenv("SHED_SLO_MS", "0")),
+                window=float(os.getenv("SHED_WINDOW_SECONDS", "10")),
+                max_queue=int(os.getenv("SHED_MAX_LLM_QUEUE", "0")),
+            ),
+        )
+
+    def check_rate(self, api_key: Optional[str], session_id: str) -> Optional[tuple]:
+        """
+        Returns (scope, retry_after_seconds) when the request is over a limit.
+        """
+        # Requests without a key (API_KEY unset) are only limited per session
+        retry_after = self.key_limiter.check(api_key) if api_key else 0.0
+        if retry_after:
+            self.rejected["key"] += 1
+            return "key", retry_after
+        retry_after = self.session_limiter.check(session_id)
+        if retry_after:
+            self.rejected["session"] += 1
+            return "session", retry_after
+        return None
+
+    def should_shed(self, llm_waiting: int = 0) -> Optional[str]:
+        reason = self.shedder.reason(llm_waiting)
+        if reason:
+            self.shed[reason] += 1
+        return reason
+
+    def observe_turn(self, seconds: float):
+        self.shedder.observe(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rejected": dict(self.rejected), "shed": dict(self.shed), "turnP95": self.shedder.p95()}
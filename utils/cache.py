@@ -0,0 +1,196 @@
+import os
+import re
+import asyncio
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, List, Dict
+
+_MISSING = object()
+_WHITESPACE_RE = re.compile(r"\s+")
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU map with an optional per-entry TTL (seconds).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value: Any, ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, _MISSING)
+        return default if item is _MISSING else item[0]
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class SQLiteCache:
+    """
+    On-disk cache backend that survives restarts. Same get/set interface as
+    LRUCache; values must be JSON-serialisable.
+
+    Reads never write: hit times for LRU eviction are buffered in memory and
+    written together with the next set(), and expired rows are left for eviction.
+    """
+
+    def __init__(self, path: str, maxsize: int = 100000, ttl: Optional[float] = None):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._touched: Dict[str, float] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (accessed_at)")
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] < now):
+                return default
+            self._touched[key] = now
+        return json.loads(row[0])
+
+    def set(self, key, value: Any, ttl: Optional[float] = None):
+        ttl = ttl if ttl is not None else self.ttl
+        now = time.time()
+        with self._lock:
+            if self._touched:
+                self._conn.executemany("UPDATE cache SET accessed_at = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()])
+                self._touched.clear()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl if ttl else None, now),
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count > self.maxsize:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (count - self.maxsize,),
+            )
+
+    def pop(self, key, default=None):
+        value = self.get(key, _MISSING)
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+        return default if value is _MISSING else value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+def normalize_text(text: str) -> str:
+    # Whitespace only: case matters in short links, UPI handles, etc.
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+class ResponseCache:
+    """
+    Content-addressed cache for deterministic (low-temperature) LLM results.
+    Keys are a SHA-256 of model name, prompt kind and the whitespace-normalised
+    prompt text, so replayed conversations cost zero LLM calls and a changed
+    prompt never reuses results cached for the old one.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else LRUCache(maxsize=4096, ttl=3600)
+        self.hits = 0
+        self.misses = 0
+        # Disk backends can wait on another process's write lock: keep them off the event loop
+        self.blocking = isinstance(self.backend, SQLiteCache)
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        maxsize = int(os.getenv("RESPONSE_CACHE_MAXSIZE", "4096"))
+        ttl = float(os.getenv("RESPONSE_CACHE_TTL", "3600")) or None
+        if os.getenv("RESPONSE_CACHE_BACKEND", "memory") == "sqlite":
+            path = os.getenv("RESPONSE_CACHE_PATH", "response_cache.db")
+            return cls(SQLiteCache(path, maxsize=maxsize, ttl=ttl))
+        return cls(LRUCache(maxsize=maxsize, ttl=ttl))
+
+    @staticmethod
+    def make_key(model: str, kind: str, texts: List[str]) -> str:
+        payload = json.dumps([model, kind, [normalize_text(t) for t in texts]], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value: Any):
+        self.backend.set(key, value)
+
+    async def aget(self, key):
+        return await asyncio.to_thread(self.get, key) if self.blocking else self.get(key)
+
+    async def aset(self, key, value: Any):
+        if self.blocking:
+            await asyncio.to_thread(self.set, key, value)
+        else:
+            self.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / total if total else 0.0,
+            "size": len(self.backend),
+        }
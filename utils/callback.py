@@ -1,13 +1,199 @@
+import os
+import json
+import time
+import random
+import asyncio
 import httpx
 import logging
+from typing import Dict, Any, Optional
 
 logger = logging.getLogger("scambaiter")
+intel_logger = logging.getLogger("scambaiter-intel")
 
 CALLBACK_URL = "https://hackathon.guvi.in/api/updateHoneyPotFinalResult"
 
+class CallbackDispatcher:
+    """
+    Long-lived delivery queue for final reports.
+
+    - one pooled keep-alive httpx.AsyncClient for all reports
+    - bounded queue; pending reports for the same sessionId are coalesced so only
+      the latest payload is sent
+    - retries with exponential backoff and full jitter
+    - reports that fail permanently are appended to a dead-letter JSONL file
+    """
+
+    def __init__(
+        self,
+        url: str = CALLBACK_URL,
+        max_queue: int = 1000,
+        workers: int = 4,
+        max_attempts: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        timeout: float = 10.0,
+        dead_letter_path: str = "callback_dead_letter.jsonl",
+    ):
+        self.url = url
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.dead_letter_path = dead_letter_path
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.client: Optional[httpx.AsyncClient] = None
+        self._tasks = []
+        self.sent = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "CallbackDispatcher":
+        return cls(
+            url=os.getenv("CALLBACK_URL", CALLBACK_URL),
+            max_queue=int(os.getenv("CALLBACK_QUEUE_SIZE", "1000")),
+            workers=int(os.getenv("CALLBACK_WORKERS", "4")),
+            max_attempts=int(os.getenv("CALLBACK_MAX_ATTEMPTS", "5")),
+            dead_letter_path=os.getenv("CALLBACK_DEAD_LETTER", "callback_dead_letter.jsonl"),
+        )
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.workers * 2, max_keepalive_connections=self.workers),
+        )
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """
+        Waits for queued reports to be delivered (up to drain_timeout), then shuts down.
+        """
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Callback queue not drained; dead-lettering {len(self.pending)} reports")
+            for payload in list(self.pending.values()):
+                await self.dead_letter(payload, "shutdown before delivery")
+            self.pending.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+
+    def submit(self, payload: Dict[str, Any]) -> bool:
+        """
+        Queues a report without waiting. Returns False when the queue is full.
+        """
+        session_id = payload["sessionId"]
+        if session_id in self.pending:
+            # Already queued: just swap in the newer payload
+            self.pending[session_id] = payload
+            self.coalesced += 1
+            return True
+        try:
+            self.queue.put_nowait(session_id)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.pending[session_id] = payload
+        return True
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    async def _worker(self):
+        while True:
+            session_id = await self.queue.get()
+            try:
+                payload = self.pending.pop(session_id, None)
+                if payload is not None:
+                    await self._deliver(payload)
+            except Exception as e:
+                logger.error(f"Callback worker error: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def _deliver(self, payload: Dict[str, Any]):
+        try:
+            error = await self._attempt_delivery(payload)
+        except asyncio.CancelledError:
+            # Shutdown cut a retry loop short: keep the report instead of losing it
+            self.failed += 1
+            logger.error(f"Delivery of report for {payload['sessionId']} cancelled; dead-lettering it")
+            self._append_line(self._dead_letter_line(payload, "shutdown during delivery"))
+            raise
+        if error is not None:
+            self.failed += 1
+            logger.error(f"Failed to send report for {payload['sessionId']}: {error}")
+            await self.dead_letter(payload, error)
+
+    async def _attempt_delivery(self, payload: Dict[str, Any]) -> Optional[str]:
+        """
+        Posts with retries; returns None once delivered, else the last error.
+        """
+        last_error = ""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = await self.client.post(self.url, json=payload)
+                if response.status_code < 400:
+                    self.sent += 1
+                    logger.info(f"Report sent successfully! Session: {payload['sessionId']} Status: {response.status_code}")
+                    return None
+                last_error = f"HTTP {response.status_code}"
+                if response.status_code < 500 and response.status_code != 429:
+                    break  # client error: retrying will not help
+            except httpx.HTTPError as e:
+                last_error = str(e) or type(e).__name__
+
+            if attempt < self.max_attempts:
+                delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+                await asyncio.sleep(random.uniform(0, delay))
+        return last_error
+
+    async def dead_letter(self, payload: Dict[str, Any], error: str):
+        await asyncio.to_thread(self._append_line, self._dead_letter_line(payload, error))
+
+    def _dead_letter_line(self, payload: Dict[str, Any], error: str) -> str:
+        return json.dumps({"failedAt": time.time(), "error": error, "payload": payload}, separators=(",", ":"))
+
+    def _append_line(self, line: str):
+        with open(self.dead_letter_path, "a") as f:
+            f.write(line + "\n")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queueDepth": self.depth(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+        }
+
+# App-lifespan managed dispatcher (see main.lifespan)
+dispatcher: Optional[CallbackDispatcher] = None
+
+async def start_dispatcher() -> CallbackDispatcher:
+    global dispatcher
+    dispatcher = CallbackDispatcher.from_env()
+    await dispatcher.start()
+    return dispatcher
+
+async def stop_dispatcher():
+    global dispatcher
+    if dispatcher:
+        await dispatcher.stop()
+        dispatcher = None
+
 async def send_final_report(session_id: str, scam_detected: bool, message_count: int, intelligence: dict):
     """
     Sends the final extracted intelligence to the evaluation endpoint.
+    Queued on the shared dispatcher when it is running; otherwise sent directly.
     """
     payload = {
         "sessionId": session_id,
@@ -16,13 +202,16 @@ async def send_final_report(session_id: str, scam_detected: bool, message_count:
         "extractedIntelligence": intelligence,
         "agentNotes": intelligence.get("agentNotes", "No notes")
     }
-    
-    import json
-    print(f"\n[Callback] Sending Final Report | Session: {session_id} | ScamDetected: {scam_detected}")
-    print(f"--- Extracted Intelligence ---")
-    print(json.dumps(intelligence, indent=2))
-    print(f"------------------------------")
-    
+
+    intel_logger.info("final_report", extra={"data": payload})
+
+    if dispatcher:
+        if dispatcher.submit(payload):
+            return True
+        logger.error(f"Callback queue full; dead-lettering report for {session_id}")
+        await dispatcher.dead_letter(payload, "queue full")
+        return False
+
     try:
         async with httpx.AsyncClient() as client:
             response = await client.post(CALLBACK_URL, json=payload, timeout=10.0)
@@ -0,0 +1,277 @@
+import os
+import re
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit
+from core.regex_engine import normalize_phone, normalize_account
+
+logger = logging.getLogger("scambaiter-main")
+
+# extractedIntelligence field -> indicator kind
+FIELD_KINDS = {"upiIds": "upi", "phoneNumbers": "phone", "bankAccounts": "account", "phishingLinks": "url"}
+# Domains and IFSC codes are shared by unrelated senders, so by default they
+# are indexed for lookups but never treated as proof of a scam on their own.
+# Only links with a path or query count as "url"; a bare "amazon.in" is a domain.
+DEFAULT_KNOWN_BAD_KINDS = "upi,phone,account,url"
+_IFSC_RE = re.compile(r"[A-Z]{4}0[A-Z0-9]{6}", re.IGNORECASE)
+
+def normalize_indicator(kind: str, value: str) -> Optional[Tuple[str, str]]:
+    value = value.strip()
+    if not value:
+        return None
+    if kind == "upi":
+        return "upi", value.lower()
+    if kind == "phone":
+        return "phone", normalize_phone(value) or value
+    if kind == "account":
+        if _IFSC_RE.fullmatch(value):
+            return "ifsc", value.upper()
+        return "account", normalize_account(value) or value
+    if kind == "url":
+        # SMS links usually come without a scheme ("bit.ly/AbCd12")
+        if "://" not in value:
+            value = "http://" + value
+        try:
+            parts = urlsplit(value)
+        except ValueError:
+            return None
+        if not parts.hostname or not (parts.path.strip("/") or parts.query):
+            domain = url_domain(value)
+            return ("domain", domain) if domain else None
+        # Scheme dropped so "bit.ly/x", "http://bit.ly/x" and "https://bit.ly/x" match;
+        # paths stay case-sensitive: short links differ only by case
+        return "url", urlunsplit(("", parts.netloc.lower(), parts.path.rstrip("/"), parts.query, "")).lstrip("/")
+    if kind == "domain":
+        return "domain", value.lower().removeprefix("www.")
+    return kind, value
+
+def url_domain(url: str) -> Optional[str]:
+    try:
+        host = urlsplit(url if "://" in url else "http://" + url).hostname
+    except ValueError:
+        return None
+    return host.removeprefix("www.") if host else None
+
+def indicators_from(intelligence: Dict[str, Any]) -> Set[Tuple[str, str]]:
+    """
+    Normalised (kind, value) pairs from an extractedIntelligence dict, plus the
+    domain of every link.
+    """
+    found = set()
+    for field, kind in FIELD_KINDS.items():
+        for value in intelligence.get(field) or []:
+            indicator = normalize_indicator(kind, str(value))
+            if indicator:
+                found.add(indicator)
+            if kind == "url":
+                domain = url_domain(str(value).strip())
+                if domain:
+                    found.add(("domain", domain))
+    return found
+
+class IntelStore:
+    """
+    SQLite store of indicators and the sessions they were seen in.
+
+    `record` only updates the in-memory index and enqueues the sighting; a writer
+    thread commits queued sightings in batches, off the request path.
+    `known_bad` is a dict lookup and never touches the database. The writer
+    thread also pulls in sightings committed by other processes sharing the file
+    every `refresh_interval` seconds, so all workers converge on one index.
+    """
+
+    def __init__(self, path: str = "intel.db", flush_interval: float = 1.0, batch_size: int = 500,
+                 known_bad_kinds: Optional[Iterable[str]] = None, refresh_interval: float = 2.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.known_bad_kinds = set(known_bad_kinds or DEFAULT_KNOWN_BAD_KINDS.split(","))
+        self.pending: "queue.Queue" = queue.Queue()
+        self.written = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS indicators ("
+            "id INTEGER PRIMARY KEY, kind TEXT NOT NULL, value TEXT NOT NULL, "
+            "first_seen REAL NOT NULL, last_seen REAL NOT NULL, UNIQUE (kind, value))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sightings ("
+            "indicator_id INTEGER NOT NULL REFERENCES indicators (id), session_id TEXT NOT NULL, "
+            "first_seen REAL NOT NULL, last_seen REAL NOT NULL, PRIMARY KEY (indicator_id, session_id)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sightings_session ON sightings (session_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sightings_last_seen ON sightings (last_seen)")
+        # indicator -> the one session that used it so far; `reused` holds
+        # indicators seen in more than one session
+        self.known: Dict[Tuple[str, str], str] = {}
+        self.reused: Set[Tuple[str, str]] = set()
+        rows = self._conn.execute(
+            "SELECT i.kind, i.value, MIN(s.session_id), COUNT(*) FROM indicators i "
+            "JOIN sightings s ON s.indicator_id = i.id GROUP BY i.id"
+        ).fetchall()
+        for kind, value, session_id, sessions in rows:
+            self.known[(kind, value)] = session_id
+            if sessions > 1:
+                self.reused.add((kind, value))
+        self._refreshed_at = time.time()
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._run, name="intel-store-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, session_id: str, intelligence: Dict[str, Any]):
+        indicators = indicators_from(intelligence)
+        if not indicators:
+            return
+        self._index(session_id, indicators)
+        self.pending.put((session_id, indicators, time.time()))
+
+    def _index(self, session_id: str, indicators: Iterable[Tuple[str, str]]):
+        for indicator in indicators:
+            if self.known.setdefault(indicator, session_id) != session_id:
+                self.reused.add(indicator)
+
+    def known_bad(
+        self, intelligence: Dict[str, Any], session_id: Optional[str] = None, require_all: bool = False
+    ) -> List[Tuple[str, str]]:
+        """
+        Indicators in `intelligence` already seen in an earlier scam session.
+        Sightings from `session_id` itself do not count. With `require_all`, the
+        result is empty unless every indicator of a known-bad kind is known.
+        """
+        found = []
+        candidates = 0
+        for indicator in indicators_from(intelligence):
+            if indicator[0] not in self.known_bad_kinds:
+                continue
+            candidates += 1
+            if indicator not in self.known:
+                continue
+            if indicator in self.reused or self.known[indicator] != session_id:
+                found.append(indicator)
+        if require_all and len(found) < candidates:
+            return []
+        return sorted(found)
+
+    def lookup(self, value: str, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Matching indicators with the sessions that used them, most recent first.
+        Without `kind` the value is tried as every kind.
+        """
+        kinds = [kind] if kind else ["upi", "phone", "account", "url", "domain"]
+        candidates = {normalize_indicator(k, value) for k in kinds} - {None}
+        results = []
+        with self._lock:
+            for k, v in sorted(candidates):
+                row = self._conn.execute(
+                    "SELECT id, first_seen, last_seen FROM indicators WHERE kind = ? AND value = ?", (k, v)
+                ).fetchone()
+                if row is None:
+                    continue
+                sessions = self._conn.execute(
+                    "SELECT session_id, first_seen, last_seen FROM sightings WHERE indicator_id = ? ORDER BY last_seen DESC",
+                    (row[0],),
+                ).fetchall()
+                results.append({
+                    "kind": k, "value": v, "firstSeen": row[1], "lastSeen": row[2],
+                    "sessions": [{"sessionId": s[0], "firstSeen": s[1], "lastSeen": s[2]} for s in sessions],
+                })
+        return results
+
+    def session_indicators(self, session_id: str) -> List[Dict[str, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT i.kind, i.value FROM sightings s JOIN indicators i ON i.id = s.indicator_id "
+                "WHERE s.session_id = ? ORDER BY i.kind, i.value",
+                (session_id,),
+            ).fetchall()
+        return [{"kind": r[0], "value": r[1]} for r in rows]
+
+    def _run(self):
+        while not self._stop.is_set() or not self.pending.empty():
+            batch = []
+            try:
+                batch.append(self.pending.get(timeout=self.flush_interval))
+                while len(batch) < self.batch_size:
+                    batch.append(self.pending.get_nowait())
+            except queue.Empty:
+                pass
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    logger.error(f"Intel store write failed ({len(batch)} sightings dropped): {e}")
+            if self.refresh_interval > 0 and time.time() - self._refreshed_at >= self.refresh_interval:
+                try:
+                    self._refresh()
+                except Exception as e:
+                    logger.error(f"Intel store refresh failed: {e}")
+
+    def _refresh(self):
+        # last_seen is the record time, which can precede its commit by a flush
+        # interval or more; re-reading a window is harmless, missing rows is not
+        started = time.time()
+        since = self._refreshed_at - max(30.0, 10 * self.flush_interval)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT i.kind, i.value, s.session_id FROM sightings s JOIN indicators i ON i.id = s.indicator_id "
+                "WHERE s.last_seen >= ?",
+                (since,),
+            ).fetchall()
+        for kind, value, session_id in rows:
+            self._index(session_id, [(kind, value)])
+        self._refreshed_at = started
+
+    def _write(self, batch: List[Tuple[str, Set[Tuple[str, str]], float]]):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for session_id, indicators, seen_at in batch:
+                    for kind, value in indicators:
+                        self._conn.execute(
+                            "INSERT INTO indicators (kind, value, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+                            "ON CONFLICT (kind, value) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)",
+                            (kind, value, seen_at, seen_at),
+                        )
+                        self._conn.execute(
+                            "INSERT INTO sightings (indicator_id, session_id, first_seen, last_seen) "
+                            "SELECT id, ?, ?, ? FROM indicators WHERE kind = ? AND value = ? "
+                            "ON CONFLICT (indicator_id, session_id) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)",
+                            (session_id, seen_at, seen_at, kind, value),
+                        )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.written += len(batch)
+
+    def close(self):
+        """
+        Flushes queued sightings and stops the writer thread.
+        """
+        self._stop.set()
+        self._writer.join()
+        self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"knownIndicators": len(self.known), "pendingWrites": self.pending.qsize(), "sightingsWritten": self.written}
+
+def create_intel_store() -> Optional[IntelStore]:
+    """
+    INTEL_STORE=sqlite (default) | off
+    """
+    if os.getenv("INTEL_STORE", "sqlite") != "sqlite":
+        return None
+    return IntelStore(
+        os.getenv("INTEL_STORE_PATH", "intel.db"),
+        flush_interval=float(os.getenv("INTEL_STORE_FLUSH_INTERVAL", "1.0")),
+        refresh_interval=float(os.getenv("INTEL_STORE_REFRESH_INTERVAL", "2.0")),
+        known_bad_kinds=os.getenv("INTEL_KNOWN_BAD_KINDS", DEFAULT_KNOWN_BAD_KINDS).split(","),
+    )
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import random
+import asyncio
+import sqlite3
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger("scambaiter-main")
+
+Handler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class JobQueue:
+    """
+    Durable SQLite job queue with an in-process async worker pool.
+
+    - jobs survive restarts; a job whose worker died is picked up again once
+      its lease expires (safe with several worker processes on one file)
+    - `dedupe_key`: a queued job with the same key is replaced by the newer
+      payload, so only the latest turn of a session is processed
+    - higher `priority` runs first; failures retry with jittered backoff up to
+      `max_attempts`, then the job is marked failed (a newer job with the same
+      dedupe_key supersedes a pending retry)
+    - database calls run in worker threads, never on the event loop; idle workers
+      poll less often (up to `max_poll_interval`) and are woken at once by a
+      local enqueue, so several processes do not keep the file's write lock busy
+    - depth()/stats() report counts refreshed in a thread every `stats_interval`
+      seconds, so metrics and /stats never query SQLite on the event loop
+    """
+
+    def __init__(
+        self,
+        path: str = "jobs.db",
+        workers: int = 4,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        lease: float = 300.0,
+        poll_interval: float = 0.5,
+        max_poll_interval: float = 5.0,
+        retention: float = 3600.0,
+        stats_interval: float = 2.0,
+    ):
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(poll_interval, max_poll_interval)
+        self.retention = retention
+        self.stats_interval = stats_interval
+        self.counts: Dict[str, int] = {}
+        self._monitor_task: Optional[asyncio.Task] = None
+        self.handlers: Dict[str, Handler] = {}
+        self.running = 0
+        self._tasks = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, dedupe_key TEXT, "
+            "priority INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "run_at REAL NOT NULL, lease_until REAL, created_at REAL NOT NULL, updated_at REAL NOT NULL, error TEXT)"
+        )
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs (dedupe_key) WHERE status = 'queued'")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, priority DESC, run_at)")
+
+    @classmethod
+    def from_env(cls) -> "JobQueue":
+        return cls(
+            path=os.getenv("JOB_QUEUE_PATH", "jobs.db"),
+            workers=int(os.getenv("JOB_WORKERS", "4")),
+            max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "3")),
+            lease=float(os.getenv("JOB_LEASE_SECONDS", "300")),
+            max_poll_interval=float(os.getenv("JOB_MAX_POLL_SECONDS", "5")),
+        )
+
+    def register(self, kind: str, handler: Handler):
+        self.handlers[kind] = handler
+
+    async def submit(self, kind: str, payload: Dict[str, Any], priority: int = 0, dedupe_key: Optional[str] = None) -> int:
+        """
+        enqueue() from async code, off the event loop.
+        """
+        return await asyncio.to_thread(self.enqueue, kind, payload, priority, dedupe_key)
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], priority: int = 0, dedupe_key: Optional[str] = None) -> int:
+        now = time.time()
+        with self._lock:
+            if dedupe_key is not None:
+                # A newer payload makes a pending retry for the same key redundant
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'superseded', updated_at = ? WHERE dedupe_key = ? AND status = 'retry'",
+                    (now, dedupe_key),
+                )
+            job_id = self._conn.execute(
+                "INSERT INTO jobs (kind, payload, dedupe_key, priority, status, run_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?) "
+                "ON CONFLICT (dedupe_key) WHERE status = 'queued' DO UPDATE SET "
+                "payload = excluded.payload, priority = MAX(priority, excluded.priority), updated_at = excluded.updated_at "
+                "RETURNING id",
+                (kind, json.dumps(payload, separators=(",", ":")), dedupe_key, priority, now, now, now),
+            ).fetchone()[0]
+        if self._wakeup and not self._loop.is_closed():
+            # Event.set() is not thread-safe; enqueue may run in a worker thread
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return job_id
+
+    def _claim(self) -> Optional[tuple]:
+        now = time.time()
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_until = ?, updated_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE (status IN ('queued', 'retry') AND run_at <= ?) "
+                "OR (status = 'running' AND lease_until < ?) ORDER BY priority DESC, run_at LIMIT 1) "
+                "RETURNING id, kind, payload, attempts",
+                (now + self.lease, now, now, now),
+            ).fetchone()
+
+    def _finish(self, job_id: int, error: Optional[str], attempts: int):
+        now = time.time()
+        with self._lock:
+            if error is None:
+                self._conn.execute("UPDATE jobs SET status = 'done', lease_until = NULL, updated_at = ?, error = NULL WHERE id = ?", (now, job_id))
+            elif attempts < self.max_attempts:
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempts - 1))))
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'retry', run_at = ?, lease_until = NULL, updated_at = ?, error = ? WHERE id = ?",
+                    (now + delay, now, error, job_id),
+                )
+            else:
+                self._conn.execute("UPDATE jobs SET status = 'failed', lease_until = NULL, updated_at = ?, error = ? WHERE id = ?", (now, error, job_id))
+
+    def _cleanup(self):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'superseded') AND updated_at < ?", (time.time() - self.retention,)
+            )
+
+    async def _worker(self):
+        idle_wait = self.poll_interval
+        while not self._stopping:
+            job = await asyncio.to_thread(self._claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=idle_wait)
+                    idle_wait = self.poll_interval
+                except asyncio.TimeoutError:
+                    # Nothing arrived: back off (jobs from other processes wait at most max_poll_interval)
+                    idle_wait = min(self.max_poll_interval, idle_wait * 2)
+                    await asyncio.to_thread(self._cleanup)
+                continue
+            idle_wait = self.poll_interval
+
+            job_id, kind, payload, attempts = job
+            self.running += 1
+            error = None
+            try:
+                handler = self.handlers.get(kind)
+                if handler is None:
+                    raise RuntimeError(f"no handler for job kind {kind!r}")
+                await handler(json.loads(payload))
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                logger.error(f"Job {job_id} ({kind}) attempt {attempts} failed: {error}")
+            finally:
+                self.running -= 1
+            await asyncio.to_thread(self._finish, job_id, error, attempts)
+
+    async def start(self):
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """
+        Lets running jobs finish (up to drain_timeout). Queued jobs stay on disk
+        for the next start.
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._monitor_task:
+            self._monitor_task.cancel()
+            self._monitor_task = None
+        _, pending = await asyncio.wait(self._tasks, timeout=drain_timeout) if self._tasks else (None, [])
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.error(f"Job queue stopped with {len(pending)} jobs still running; they will rerun after the lease expires")
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, dedupe_key, priority, status, attempts, error, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ["id", "kind", "dedupeKey", "priority", "status", "attempts", "error", "createdAt", "updatedAt"]
+        return dict(zip(keys, row))
+
+    def has_key(self, dedupe_key: str) -> bool:
+        """
+        True when any job (in any state, until cleanup) was submitted under dedupe_key.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM jobs WHERE dedupe_key = ? LIMIT 1", (dedupe_key,)).fetchone()
+        return row is not None
+
+    def _count(self):
+        with self._lock:
+            self.counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    async def _monitor(self):
+        while True:
+            try:
+                await asyncio.to_thread(self._count)
+            except Exception as e:
+                logger.error(f"Job queue stats refresh failed: {e}")
+            await asyncio.sleep(self.stats_interval)
+
+    def depth(self) -> int:
+        """
+        Jobs waiting to run in all processes, as of the last stats refresh.
+        """
+        return self.counts.get("queued", 0) + self.counts.get("retry", 0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"depth": self.depth(), "runningHere": self.running, "byStatus": dict(self.counts)}
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import queue
+import logging
+import logging.handlers
+from typing import Dict, Any, Optional
+
+class JsonFormatter(logging.Formatter):
+    """
+    One compact JSON object per line. Structured payloads go in `extra={"data": ...}`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        data = getattr(record, "data", None)
+        if data is not None:
+            entry["data"] = data
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(",", ":"), ensure_ascii=False, default=str)
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.TimedRotatingFileHandler):
+    """
+    Rotates on the time schedule *or* once the file exceeds maxBytes, whichever comes first.
+    Size rollovers are numbered within the current period (app.log.2024-05-01.1, .2, ...)
+    so they never overwrite each other or the period's timed backup; backupCount
+    keeps the newest backups of either kind.
+    """
+
+    def __init__(self, filename: str, maxBytes: int = 0, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.maxBytes = maxBytes
+        self._size_rollover = False
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        self._size_rollover = False
+        if super().shouldRollover(record):
+            return 1
+        if self.maxBytes > 0 and self.stream is not None:
+            self.stream.seek(0, 2)
+            if self.stream.tell() + len(self.format(record)) + 1 >= self.maxBytes:
+                self._size_rollover = True
+                return 1
+        return 0
+
+    def doRollover(self):
+        if not self._size_rollover:
+            return super().doRollover()
+        self._size_rollover = False
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        now = time.time()
+        period = time.strftime(self.suffix, time.gmtime(now) if self.utc else time.localtime(now))
+        # Continue after the highest number so far, even if older ones were pruned
+        prefix = f"{os.path.basename(self.baseFilename)}.{period}."
+        taken = [name[len(prefix):] for name in os.listdir(os.path.dirname(self.baseFilename)) if name.startswith(prefix)]
+        n = max([int(t) for t in taken if t.isdigit()], default=0) + 1
+        self.rotate(self.baseFilename, self.rotation_filename(f"{self.baseFilename}.{period}.{n}"))
+        if self.backupCount > 0:
+            for path in self.getFilesToDelete():
+                os.remove(path)
+        if not self.delay:
+            self.stream = self._open()
+
+    def getFilesToDelete(self):
+        prefix = os.path.basename(self.baseFilename) + "."
+        directory = os.path.dirname(self.baseFilename)
+        backups = [os.path.join(directory, name) for name in os.listdir(directory) if name.startswith(prefix)]
+        if len(backups) <= self.backupCount:
+            return []
+        backups.sort(key=lambda path: (os.stat(path).st_mtime_ns, path))
+        return backups[:len(backups) - self.backupCount]
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Never blocks the caller: when the bounded buffer is full the record is dropped and counted.
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_queue_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def _worker_path(path: str) -> str:
+    # Rotation is not safe across processes, so each worker gets its own files
+    if os.getenv("LOG_PER_WORKER") != "1":
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{ext}"
+
+def _file_handler(path: str, logger_name: str) -> logging.Handler:
+    handler = SizeAndTimeRotatingFileHandler(
+        _worker_path(path),
+        maxBytes=int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+        when=os.getenv("LOG_ROTATE_WHEN", "midnight"),
+        backupCount=int(os.getenv("LOG_BACKUP_COUNT", "5")),
+        delay=True,
+    )
+    handler.setFormatter(JsonFormatter())
+    handler.addFilter(logging.Filter(logger_name))
+    return handler
+
+def setup_logging(level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """
+    Routes all logging through a bounded in-memory queue drained by a background
+    QueueListener thread, so request handlers never block on disk or stdout.
+    - stdout: every record
+    - conversation.log: scambaiter-main
+    - extracted_intelligence.log: scambaiter-intel
+    """
+    global _queue_handler, _listener
+    if _listener is not None:
+        return _listener
+
+    log_queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+
+    console = logging.StreamHandler()
+    console.setFormatter(JsonFormatter())
+
+    _listener = logging.handlers.QueueListener(
+        log_queue,
+        console,
+        _file_handler(os.getenv("CONVERSATION_LOG", "conversation.log"), "scambaiter-main"),
+        _file_handler(os.getenv("INTEL_LOG", "extracted_intelligence.log"), "scambaiter-intel"),
+        respect_handler_level=True,
+    )
+
+    _queue_handler = DroppingQueueHandler(log_queue)
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(level)
+
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    """
+    Flushes queued records and stops the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "dropped": _queue_handler.dropped if _queue_handler else 0,
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+    }
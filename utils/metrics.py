@@ -0,0 +1,133 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Minimal Prometheus text-format metrics (no prometheus_client dependency)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(key: LabelKey, extra: Optional[Dict[str, str]] = None) -> str:
+    items = list(key) + sorted((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+class Gauge:
+    """
+    Value read at scrape time from `fn`, which returns a number or a
+    {label_value: number} dict for a single label named `label`. Use
+    kind="counter" for cumulative values kept by other components.
+    """
+
+    def __init__(self, name: str, help: str, fn: Callable, label: Optional[str] = None, kind: str = "gauge"):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.label = label
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            value = self.fn()
+        except Exception:
+            return lines
+        if self.label:
+            for label_value, v in sorted((value or {}).items()):
+                lines.append(f"{self.name}{_format_labels(((self.label, str(label_value)),))} {v}")
+        else:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series: Dict[LabelKey, List[float]] = {}  # bucket counts + [sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.series.items()):
+            for i, bound in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': str(bound)})} {series[i]}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+STAGE_LATENCY = registry.register(Histogram("honeypot_stage_latency_seconds", "Latency of each request/background stage"))
+LLM_REQUESTS = registry.register(Counter("honeypot_llm_requests_total", "LLM calls by module and outcome"))
+LLM_TOKENS = registry.register(Counter("honeypot_llm_tokens_total", "LLM tokens reported in completion usage"))
+LLM_HEDGES = registry.register(Counter("honeypot_llm_hedged_requests_total", "Hedge requests fired after the p95 delay"))
+LLM_FAILOVERS = registry.register(Counter("honeypot_llm_failovers_total", "Calls that moved on to a fallback model"))
+FALLBACKS = registry.register(Counter("honeypot_fallbacks_total", "Fallback paths taken instead of an LLM result"))
+EXCEPTIONS = registry.register(Counter("honeypot_exceptions_total", "Exceptions caught per module"))
+TEMPLATE_REPLIES = registry.register(Counter("honeypot_template_replies_total", "Agent replies served from the local template bank instead of the LLM"))
+
+def register_gauge(name: str, help: str, fn: Callable, label: Optional[str] = None, kind: str = "gauge") -> Gauge:
+    return registry.register(Gauge(name, help, fn, label, kind))
@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from models.api import MessageItem, SenderType
+from utils.cache import LRUCache
+
+class SessionStore(ABC):
+    """
+    Server-side conversation history keyed by sessionId, so clients only need to
+    send the new message each turn.
+    """
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[List[MessageItem]]:
+        ...
+
+    @abstractmethod
+    def append(self, session_id: str, messages: List[MessageItem]):
+        ...
+
+    @abstractmethod
+    def replace(self, session_id: str, messages: List[MessageItem]):
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        ...
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process store with LRU eviction of whole sessions.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl: Optional[float] = None):
+        self.sessions = LRUCache(maxsize=max_sessions, ttl=ttl)
+
+    def get(self, session_id: str) -> Optional[List[MessageItem]]:
+        history = self.sessions.get(session_id)
+        return list(history) if history is not None else None
+
+    def append(self, session_id: str, messages: List[MessageItem]):
+        history = self.sessions.get(session_id)
+        if history is None:
+            self.sessions.set(session_id, list(messages))
+        else:
+            history.extend(messages)
+
+    def replace(self, session_id: str, messages: List[MessageItem]):
+        self.sessions.set(session_id, list(messages))
+
+    def delete(self, session_id: str):
+        self.sessions.pop(session_id)
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Durable store; appends are O(1) rows per turn.
+    """
+
+    def __init__(self, path: str = "sessions.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, sender TEXT NOT NULL, "
+            "text TEXT NOT NULL, timestamp INTEGER NOT NULL, PRIMARY KEY (session_id, seq))"
+        )
+
+    def get(self, session_id: str) -> Optional[List[MessageItem]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sender, text, timestamp FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        if not rows:
+            return None
+        # Rows were validated on the way in; skip re-validation
+        return [MessageItem.model_construct(sender=SenderType(r[0]), text=r[1], timestamp=r[2]) for r in rows]
+
+    def append(self, session_id: str, messages: List[MessageItem]):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                start = self._conn.execute(
+                    "SELECT COALESCE(MAX(seq) + 1, 0) FROM messages WHERE session_id = ?", (session_id,)
+                ).fetchone()[0]
+                self._insert(session_id, messages, start)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def replace(self, session_id: str, messages: List[MessageItem]):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                self._insert(session_id, messages, 0)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _insert(self, session_id: str, messages: List[MessageItem], start: int):
+        self._conn.executemany(
+            "INSERT INTO messages (session_id, seq, sender, text, timestamp) VALUES (?, ?, ?, ?, ?)",
+            [(session_id, start + i, m.sender.value, m.text, m.timestamp) for i, m in enumerate(messages)],
+        )
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+def histories_consistent(stored: List[MessageItem], client: List[MessageItem]) -> bool:
+    """
+    True when the client's history matches what the server recorded (ignoring timestamps).
+    """
+    if len(stored) != len(client):
+        return False
+    return all(a.sender == b.sender and a.text == b.text for a, b in zip(stored, client))
+
+def create_session_store() -> Optional[SessionStore]:
+    """
+    SESSION_STORE=memory (default) | sqlite | off
+    """
+    backend = os.getenv("SESSION_STORE", "memory")
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("SESSION_STORE_PATH", "sessions.db"))
+    if backend == "memory":
+        return MemorySessionStore(max_sessions=int(os.getenv("SESSION_STORE_MAX_SESSIONS", "10000")))
+    return None